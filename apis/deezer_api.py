@@ -3,21 +3,110 @@ import time
 import re
 import sys
 import asyncio
+import atexit
 import os
-import datetime
+import difflib
+import email.utils
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+from config import DEEZER_MAX_CONCURRENT_REQUESTS, DEEZER_RATE_LIMIT_REQUESTS, DEEZER_RATE_LIMIT_PERIOD
+from config import DEEZER_BACKOFF_BASE, DEEZER_BACKOFF_MAX
+from config import DEEZER_CACHE_TTL, DEEZER_CACHE_MISS_TTL, DEEZER_PARALLEL_SEARCH, DEEZER_SEARCH_WAVE_SIZE
+from config import DEEZER_MATCH_THRESHOLD
+from config import DEEZER_AVAILABLE_TTL, DEEZER_UNAVAILABLE_TTL
+from config import (
+    DEEZER_LOG_FILE, DEEZER_LOG_LEVEL, DEEZER_LOG_PAYLOADS, DEEZER_LOG_SAMPLE_RATE,
+    DEEZER_LOG_MAX_BYTES, DEEZER_LOG_BACKUP_COUNT
+)
+from apis.rate_limiter import RateLimiter
+from apis import http_client
+from utils import PersistentCache
+
+logger = logging.getLogger("re-command.deezer")
+_logger_lock = threading.Lock()
+_log_listener = None
+
+class _SampleFilter(logging.Filter):
+    """Keeps only a DEEZER_LOG_SAMPLE_RATE fraction of the per-request records (those logged with sampled=True)."""
+
+    def filter(self, record):
+        if getattr(record, "sampled", False) and DEEZER_LOG_SAMPLE_RATE < 1:
+            return random.random() < DEEZER_LOG_SAMPLE_RATE
+        return True
+
+def _setup_logger():
+    """
+    Configures the Deezer logger once per process. Records are put on a queue and written by a
+    background thread to a size-rotated file, so logging never blocks the event loop on disk I/O.
+    """
+    global _log_listener
+    with _logger_lock:
+        if _log_listener is not None:
+            return
+        file_handler = logging.handlers.RotatingFileHandler(
+            DEEZER_LOG_FILE, maxBytes=DEEZER_LOG_MAX_BYTES, backupCount=DEEZER_LOG_BACKUP_COUNT,
+            encoding="utf-8", delay=True
+        )
+        file_handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s %(message)s", "%Y-%m-%d %H:%M:%S"))
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(_SampleFilter())
+        logger.addHandler(queue_handler)
+        logger.setLevel(getattr(logging, str(DEEZER_LOG_LEVEL).upper(), logging.INFO))
+        logger.propagate = False
+        _log_listener = logging.handlers.QueueListener(log_queue, file_handler)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+
+class DeezerAPIError(requests.exceptions.RequestException):
+    """Deezer answered with an error body ({"error": {...}}), usually with HTTP 200."""
+
+    def __init__(self, message, code=None, retry_after=None):
+        super().__init__(message)
+        self.code = code
+        self.retry_after = retry_after
+
+class DeezerQuotaError(DeezerAPIError):
+    """Deezer is throttling us (quota error code 4, service busy, or HTTP 429/503); worth retrying later."""
+
+# Error codes from https://developers.deezer.com/api/errors that mean "slow down" rather than "bad request"
+DEEZER_THROTTLE_ERROR_CODES = {4, 700}
 
 class DeezerAPI:
+    # Shared by every DeezerAPI instance in the process so the quota and backoff are enforced globally
+    rate_limiter = RateLimiter(
+        "deezer", DEEZER_MAX_CONCURRENT_REQUESTS, DEEZER_RATE_LIMIT_REQUESTS, DEEZER_RATE_LIMIT_PERIOD,
+        backoff_base=DEEZER_BACKOFF_BASE, backoff_max=DEEZER_BACKOFF_MAX
+    )
+
+    @classmethod
+    def get_rate_limiter_state(cls):
+        """Returns the shared Deezer rate limiter's current load and queueing delay."""
+        return cls.rate_limiter.state()
+
     def __init__(self):
         self.search_url = "https://api.deezer.com/search"
         self.track_url_base = "https://api.deezer.com/track/"
-        self.log_file_path = "/app/deezer_api_debug.log"
-        self._availability_cache = {}
+        self.log_file_path = DEEZER_LOG_FILE
+        self.search_cache = PersistentCache("deezer_search")
+        self.availability_cache = PersistentCache("deezer_availability")
 
-    def _log_to_file(self, message):
-        """Logs messages to a specified file."""
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(self.log_file_path, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {message}\n")
+    def _log_to_file(self, message, level=logging.DEBUG, sampled=False, **fields):
+        """
+        Logs a message to the Deezer log. Extra keyword fields are appended as key=value pairs;
+        sampled=True marks high-volume per-request records that DEEZER_LOG_SAMPLE_RATE may drop.
+        """
+        if _log_listener is None:
+            _setup_logger()
+        # Checked before anything else, so records below the configured level cost no formatting or locking
+        if not logger.isEnabledFor(level):
+            return
+        if fields:
+            message = f"{message} " + " ".join(f"{key}={value!r}" for key, value in fields.items())
+        logger.log(level, message, extra={"sampled": sampled})
 
     def _normalize_string(self, s):
         """Normalizes strings for comparison by replacing special characters."""
@@ -47,39 +136,163 @@ class DeezerAPI:
                 title = title[:-len(suffix)]
         return title.strip()
 
+    @staticmethod
+    def _retry_after(response):
+        """Parses a Retry-After header (seconds or HTTP date) into seconds, or None."""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _check_response(self, response):
+        """Raises DeezerQuotaError/DeezerAPIError for throttling statuses and error bodies."""
+        if response.status_code in (429, 503):
+            raise DeezerQuotaError(f"HTTP {response.status_code}", retry_after=self._retry_after(response))
+        response.raise_for_status()
+
+        # Error bodies are small and start with the error key; avoid parsing every large search payload
+        if not response.content.lstrip()[:16].startswith(b'{"error"'):
+            return
+        try:
+            error = response.json().get('error') or {}
+        except ValueError:
+            return
+        code = error.get('code')
+        message = f"Deezer error {code}: {error.get('message', error.get('type', 'unknown'))}"
+        if code in DEEZER_THROTTLE_ERROR_CODES:
+            raise DeezerQuotaError(message, code=code, retry_after=self._retry_after(response))
+        raise DeezerAPIError(message, code=code)
+
     async def _make_request_with_retries(self, url, params=None, max_retries=3, initial_delay=1):
-        """Makes an HTTP GET request with retry logic and exponential backoff."""
+        """
+        Makes an HTTP GET request with retry logic and jittered exponential backoff.
+        Throttling responses pause the shared rate limiter, so every in-flight request backs off together.
+        Other Deezer error bodies raise DeezerAPIError without retrying.
+        """
         for attempt in range(max_retries):
             try:
-                # Log the full URL being requested
-                full_url = requests.Request('GET', url, params=params).prepare().url
-                self._log_to_file(f"Deezer API: Attempt {attempt + 1}/{max_retries} - Requesting URL: {full_url}")
-
-                response = await asyncio.to_thread(requests.get, url, params=params)
-                response.raise_for_status()
-
-                # Log the raw response content
-                self._log_to_file(f"Deezer API: Response (status {response.status_code}): {response.text}")
+                self._log_to_file("request", sampled=True, url=url, params=params, attempt=f"{attempt + 1}/{max_retries}")
+                started = time.monotonic()
+
+                async with self.rate_limiter:
+                    response = await http_client.get(url, params=params)
+                self._check_response(response)
+                self.rate_limiter.record_success()
+
+                self._log_to_file(
+                    "response", sampled=True, url=url, status=response.status_code,
+                    bytes=len(response.content), elapsed_ms=round((time.monotonic() - started) * 1000)
+                )
+                if DEEZER_LOG_PAYLOADS:
+                    self._log_to_file("response payload", url=url, body=response.text)
                 return response
+            except DeezerQuotaError as e:
+                pause = self.rate_limiter.record_throttle(e.retry_after)
+                self._log_to_file("throttled", level=logging.WARNING, url=url, attempt=f"{attempt + 1}/{max_retries}", error=str(e), pause=round(pause, 2))
+                if attempt == max_retries - 1:
+                    raise
+                # No sleep here: the retry waits for the shared pause when it acquires the limiter
+            except DeezerAPIError as e:
+                self._log_to_file("request failed", level=logging.WARNING, url=url, params=params, error=str(e))
+                raise
             except requests.exceptions.RequestException as e:
-                self._log_to_file(f"Deezer API: Request error on attempt {attempt + 1}/{max_retries} to {full_url}: {e}")
+                self._log_to_file("request failed", level=logging.WARNING, url=url, params=params, attempt=f"{attempt + 1}/{max_retries}", error=str(e))
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(initial_delay * (2 ** attempt))
+                    await asyncio.sleep(initial_delay * (2 ** attempt) * random.uniform(0.5, 1.5))
                 else:
                     raise
         return None
 
-    async def get_deezer_track_link(self, artist, title):
-        """
-        Searches for a track on Deezer and returns the track link.
+    def _similarity(self, a, b):
+        """Returns how alike two normalized strings are, from 0.0 to 1.0."""
+        if not a or not b:
+            return 0.0
+        return difflib.SequenceMatcher(None, a, b).ratio()
 
-        Args:
-            artist: The artist name.
-            title: The track title.
+    async def _search_in_waves(self, url, queries, score_result):
+        """
+        Runs search queries in priority order and scores every result with score_result; the best
+        result of the highest-priority query that clears DEEZER_MATCH_THRESHOLD is accepted.
+        With DEEZER_PARALLEL_SEARCH the queries go out concurrently in waves of DEEZER_SEARCH_WAVE_SIZE
+        (each still waits for the shared rate limiter). As soon as a query's result is accepted, the
+        lower-priority queries still queued or in flight are cancelled and no further wave is sent.
+        Both modes accept the same result.
+
+        Returns (accepted result or None, first result of the highest-priority query that had any, had_errors).
+        """
+        async def run(query):
+            response = await self._make_request_with_retries(url, params={"q": query})
+            if not response:
+                return []
+            data = response.json()
+            if DEEZER_LOG_PAYLOADS:
+                self._log_to_file(f"Deezer API: Response for query '{query}': {data}")
+            return data.get('data') or []
+
+        wave_size = max(1, DEEZER_SEARCH_WAVE_SIZE) if DEEZER_PARALLEL_SEARCH else 1
+        first_hit = None
+        had_errors = False
+        for start in range(0, len(queries), wave_size):
+            wave = queries[start:start + wave_size]
+            self._log_to_file(f"Deezer API: Searching with queries: {wave}")
+            tasks = [asyncio.ensure_future(run(query)) for query in wave]
+            try:
+                # Highest priority first: a lower-priority match only counts once everything above it missed
+                for query, task in zip(wave, tasks):
+                    try:
+                        items = await task
+                    except Exception as e:
+                        had_errors = True
+                        self._log_to_file(f"Error during Deezer search with query '{query}': {e}", level=logging.WARNING)
+                        continue
+                    if items and first_hit is None:
+                        first_hit = items[0]
+                    scored = [(score_result(item), item) for item in items]
+                    if scored:
+                        best_score, best = max(scored, key=lambda pair: pair[0])
+                        if best_score >= DEEZER_MATCH_THRESHOLD:
+                            self._log_to_file(f"Deezer API: Accepted result for query '{query}' with score {best_score:.2f}")
+                            return best, first_hit, had_errors
+            finally:
+                pending = [task for task in tasks if not task.done()]
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        return None, first_hit, had_errors
+
+    def _track_summary(self, track):
+        """Reduces a Deezer track object to the fields the pipeline uses."""
+        album = track.get('album') or {}
+        return {
+            "id": str(track.get('id')),
+            "link": track.get('link'),
+            "title": track.get('title'),
+            "artist": (track.get('artist') or {}).get('name'),
+            "preview": track.get('preview'),
+            "album": album.get('title'),
+            "album_art": album.get("cover_xl", album.get("cover_big", album.get("cover_medium", album.get("cover", None)))),
+            "release_date": track.get('release_date')
+        }
 
-        Returns:
-            The Deezer track link if found, otherwise None.
+    async def _search_track(self, artist, title):
         """
+        Runs the track search cascade and returns the first hit as a summary dict, or None.
+        Hits and misses are cached persistently by normalized artist/title; misses caused by
+        request errors are not cached.
+        """
+        cache_key = f"track:{self._normalize_string(artist)}|{self._normalize_string(title)}"
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return None if cached.get('missing') else cached
+
         cleaned_title = self._clean_title(title)
         search_queries = [
             f'artist:"{artist}" track:"{cleaned_title}"',
@@ -89,18 +302,41 @@ class DeezerAPI:
             f'{artist} {title}' # Broad search without specific field tags
         ]
 
-        for query in search_queries:
-            params = {"q": query}
-            try:
-                response = await self._make_request_with_retries(self.search_url, params=params)
-                if response:
-                    data = response.json()
-                    if data.get('data') and len(data['data']) > 0:
-                        return data['data'][0]['link']
-            except Exception as e:
-                print(f"Error during Deezer search with query '{query}': {e}")
+        wanted_artist = self._normalize_string(artist)
+        wanted_title = self._normalize_string(cleaned_title)
+
+        def score(track):
+            found_title = self._normalize_string(self._clean_title(track.get('title', '')))
+            found_artist = self._normalize_string((track.get('artist') or {}).get('name', ''))
+            artist_score = 1.0 if found_artist and (found_artist in wanted_artist or wanted_artist in found_artist) else self._similarity(found_artist, wanted_artist)
+            return min(self._similarity(found_title, wanted_title), artist_score)
+
+        # Without a match above the threshold, keep the old behaviour: the first hit of the highest-priority query
+        accepted, first_hit, had_errors = await self._search_in_waves(self.search_url, search_queries, score)
+        track = accepted or first_hit
+        if track:
+            track = self._track_summary(track)
+            self.search_cache.set(cache_key, track, ttl=DEEZER_CACHE_TTL)
+            return track
+
+        if not had_errors:
+            self.search_cache.set(cache_key, {"missing": True}, ttl=DEEZER_CACHE_MISS_TTL)
         return None
 
+    async def get_deezer_track_link(self, artist, title):
+        """
+        Searches for a track on Deezer and returns the track link.
+
+        Args:
+            artist: The artist name.
+            title: The track title.
+
+        Returns:
+            The Deezer track link if found, otherwise None.
+        """
+        track = await self._search_track(artist, title)
+        return track["link"] if track else None
+
     async def get_deezer_track_details(self, track_id):
         """
         Fetches track details, including album name and cover, from Deezer using the track ID.
@@ -111,6 +347,11 @@ class DeezerAPI:
         Returns:
             A dictionary containing track details (including album name and cover) or None if an error occurs.
         """
+        cache_key = f"track_details:{track_id}"
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         track_url = f"{self.track_url_base}{track_id}"
         try:
             response = await self._make_request_with_retries(track_url)
@@ -119,11 +360,13 @@ class DeezerAPI:
 
                 if data and data.get("album") and data["album"].get("title"):
                     album_cover = data["album"].get("cover_xl", data["album"].get("cover_big", data["album"].get("cover_medium", data["album"].get("cover", None))))
-                    return {
+                    details = {
                         "album": data["album"]["title"],
                         "release_date": data.get("release_date"),
                         "album_art": album_cover
                     }
+                    self.search_cache.set(cache_key, details, ttl=DEEZER_CACHE_TTL)
+                    return details
                 else:
                     print(f"Album information not found for track ID {track_id}")
                     return None
@@ -170,35 +413,37 @@ class DeezerAPI:
                 print(f"Error during Deezer album search with query '{query}': {e}")
         return None
 
-    async def get_deezer_track_details_from_artist_title(self, artist, title):
+    async def get_deezer_track_details_from_artist_title(self, artist, title, include_release_date=False):
         """
-        Fetches track details from Deezer using artist and title.
+        Fetches track details from Deezer using artist and title. The album title and cover come from
+        the search hit itself, so /track/{id} is only requested for the release date, when asked for.
 
         Args:
             artist: Artist name
             title: Track title
+            include_release_date: Also look up the release date, which search hits don't carry
 
         Returns:
-            Track details dict or None
+            Track details dict (deezer_id, deezer_link, title, artist, preview, album, album_art, release_date) or None
         """
         # Try original search first
-        link = await self.get_deezer_track_link(artist, title)
-        if link:
-            track_id = link.split('/')[-1]
-            details = await self.get_deezer_track_details(track_id)
-            if details:
-                return details
+        track = await self._search_track(artist, title)
 
         # Clean artist: remove featurings
-        cleaned_artist = re.sub(r'\s*(?:feat\.?|featuring|ft\.?)\s*.*', '', artist, flags=re.IGNORECASE).strip()
-        if cleaned_artist != artist:
-            link = await self.get_deezer_track_link(cleaned_artist, title)
-            if link:
-                track_id = link.split('/')[-1]
-                details = await self.get_deezer_track_details(track_id)
-                if details:
-                    return details
-        return None
+        if not track:
+            cleaned_artist = re.sub(r'\s*(?:feat\.?|featuring|ft\.?)\s*.*', '', artist, flags=re.IGNORECASE).strip()
+            if cleaned_artist != artist:
+                track = await self._search_track(cleaned_artist, title)
+        if not track:
+            return None
+
+        details = {**track, "deezer_id": track["id"], "deezer_link": track["link"]}
+        if include_release_date and not details.get("release_date"):
+            track_details = await self.get_deezer_track_details(track["id"])
+            if track_details:
+                details["release_date"] = track_details.get("release_date")
+                details["album_art"] = details.get("album_art") or track_details.get("album_art")
+        return details
 
     async def get_deezer_track_preview(self, artist, title):
         """
@@ -211,28 +456,11 @@ class DeezerAPI:
         Returns:
             The Deezer track preview URL if found, otherwise None.
         """
-        cleaned_title = self._clean_title(title)
-        search_queries = [
-            f'artist:"{artist}" track:"{cleaned_title}"',
-            f'artist:"{artist}" track:"{title}"', # Original title as fallback
-            f'artist:{artist} track:{cleaned_title}', # Without quotes
-            f'artist:{artist} track:{title}' # Without quotes, original title
-        ]
+        track = await self._search_track(artist, title)
+        return track.get("preview") if track else None
 
-        for query in search_queries:
-            params = {"q": query}
-            try:
-                response = await self._make_request_with_retries(self.search_url, params=params)
-                if response:
-                    data = response.json()
-                    if data.get('data') and len(data['data']) > 0:
-                        track = data['data'][0]
-                        preview_url = track.get('preview')
-                        if preview_url:
-                            return preview_url
-            except Exception as e:
-                print(f"Error during Deezer preview search with query '{query}': {e}")
-        return None
+    def _album_cache_key(self, artist, album_title):
+        return f"album:{self._normalize_string(artist)}|{self._normalize_string(album_title)}"
 
     async def get_deezer_album_link(self, artist, album_title):
         """
@@ -250,6 +478,13 @@ class DeezerAPI:
         original_artist_lower = self._normalize_string(artist)
         original_album_lower = self._normalize_string(album_title)
 
+        cache_key = self._album_cache_key(artist, album_title)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            if cached.get('missing'):
+                return None, None
+            return cached['link'], cached
+
         # Handle various forms of the artist name for queries
         cleaned_artist_for_query_strict = artist.replace('’', "'").replace('Ø', 'O')
         cleaned_artist_for_query_spaces = cleaned_artist_for_query_strict.replace('&', ' ')
@@ -306,38 +541,27 @@ class DeezerAPI:
         # Use a set to store unique queries to avoid redundant API calls
         unique_search_queries = list(dict.fromkeys(search_queries))
 
-        for query in unique_search_queries:
-            params = {"q": query}
-            self._log_to_file(f"Deezer API: Searching for album with query: '{query}'")
-            try:
-                response = await self._make_request_with_retries(self.search_url + "/album", params=params)
-                if response:
-                    data = response.json()
-                    self._log_to_file(f"Deezer API: Response for album query '{query}': {data}")
-                    if data.get('data') and len(data['data']) > 0:
-                        first_result = data['data'][0]
-                        found_album_title = self._normalize_string(first_result.get('title', ''))
-                        found_artist_name = self._normalize_string(first_result.get('artist', {}).get('name', ''))
-
-                        # Relaxed matching logic using normalized strings
-                        album_title_match = (found_album_title == original_album_lower)
-
-                        # Check if found artist name is an exact match for any of the normalized variations or if any part of the original normalized artist names is in the found artist name
-                        artist_name_match = (
-                            found_artist_name in original_artist_lower or 
-                            any(found_artist_name == var for var in all_artist_variations) or 
-                            any(var in found_artist_name for var in all_artist_variations if var)
-                        )
-                        
-                        if album_title_match and artist_name_match:
-                            self._log_to_file(f"Deezer API: Found a matching album link: {first_result['link']}")
-                            return first_result['link'], first_result # Return both link and full result
-                        else:
-                            self._log_to_file(f"Deezer API: First result '{found_artist_name} - {found_album_title}' not a close enough match for normalized '{original_artist_lower} - {original_album_lower}'. Album match: {album_title_match}, Artist match: {artist_name_match}. Trying next query...")
-
-
-            except Exception as e:
-                self._log_to_file(f"Error during Deezer album search with query '{query}': {e}")
+        def score(result):
+            found_album_title = self._normalize_string(result.get('title', ''))
+            found_artist_name = self._normalize_string(result.get('artist', {}).get('name', ''))
+
+            # Check if found artist name is an exact match for any of the normalized variations or if any part of the original normalized artist names is in the found artist name
+            artist_name_match = found_artist_name and (
+                found_artist_name in original_artist_lower or 
+                any(found_artist_name == var for var in all_artist_variations) or 
+                any(var in found_artist_name for var in all_artist_variations if var)
+            )
+            artist_score = 1.0 if artist_name_match else max(self._similarity(found_artist_name, var) for var in all_artist_variations)
+            return min(self._similarity(found_album_title, original_album_lower), artist_score)
+
+        album, _, had_errors = await self._search_in_waves(self.search_url + "/album", unique_search_queries, score)
+        if album:
+            self._log_to_file(f"Deezer API: Found a matching album link: {album['link']}", level=logging.INFO)
+            self.search_cache.set(cache_key, album, ttl=DEEZER_CACHE_TTL)
+            return album['link'], album # Return both link and full result
+
+        if not had_errors:
+            self.search_cache.set(cache_key, {"missing": True}, ttl=DEEZER_CACHE_MISS_TTL)
         return None, None # Return None for both link and result if not found
 
     async def get_deezer_album_tracks(self, album_id):
@@ -426,48 +650,69 @@ class DeezerAPI:
 
         return tracks
 
+    async def _album_has_tracks(self, album_id):
+        """Checks that an album has at least one track with a single limit=1 request."""
+        response = await self._make_request_with_retries(f"https://api.deezer.com/album/{album_id}/tracks", params={"limit": 1})
+        if not response:
+            return False
+        data = response.json()
+        return bool(data.get('data')) or (data.get('total') or 0) > 0
+
     async def check_album_download_availability(self, artist, album_title):
         """
         Checks if an album is available for download on Deezer by finding its link
-        and then attempting to retrieve its tracklist.
+        and then checking that it has tracks.
+
+        Results are cached persistently: available albums for DEEZER_AVAILABLE_TTL, unavailable ones
+        for the shorter DEEZER_UNAVAILABLE_TTL since fresh releases often show up on Deezer later
+        (a recheck bypasses the cached album search miss). Errors are not cached.
 
         Args:
-            artist: The artist name.
+            artist: The album artist name.
             album_title: The album title.
 
         Returns:
             True if the album is found and has at least one track, False otherwise.
         """
-        cache_key = f"{artist}-{album_title}".lower()
+        cache_key = f"{self._normalize_string(artist)}|{self._normalize_string(album_title)}"
+        cached = self.availability_cache.get(cache_key)
+        if cached is not None:
+            self._log_to_file(f"DeezerAPI: Returning cached availability ({cached}) for '{artist}' - '{album_title}'")
+            return cached
 
-        # Check cache only for 'True' results, which are effectively permanent
-        if cache_key in self._availability_cache and self._availability_cache[cache_key] is True:
-            self._log_to_file(f"DeezerAPI: Returning cached 'available' status for '{artist}' - '{album_title}'")
-            return True
+        self._log_to_file(f"DeezerAPI: Checking download availability for artist='{artist}', album='{album_title}'")
 
-        self._log_to_file(f"DeezerAPI: Checking download availability for artist='{artist}', album='{album_title}' (not cached 'True' or new album)")
-        is_available = False
+        # A cached "not found" album search would outlive DEEZER_UNAVAILABLE_TTL, so search again on a recheck
+        album_cache_key = self._album_cache_key(artist, album_title)
+        cached_search = self.search_cache.get(album_cache_key)
+        if cached_search is not None and cached_search.get('missing'):
+            self.search_cache.delete(album_cache_key)
 
         try:
             album_link, album_info = await self.get_deezer_album_link(artist, album_title)
 
             if album_link:
-                album_id = album_link.split('/')[-1]
-                tracks = await self.get_deezer_album_tracks(album_id)
-                if tracks and len(tracks) > 0:
-                    self._log_to_file(f"DeezerAPI: Album '{album_title}' by '{artist}' is available for download (found {len(tracks)} tracks).")
-                    is_available = True
+                # Album search hits carry the track count; only probe the tracklist when it's missing
+                nb_tracks = album_info.get('nb_tracks') if album_info else None
+                if nb_tracks is not None:
+                    is_available = nb_tracks > 0
                 else:
-                    self._log_to_file(f"DeezerAPI: Album '{album_title}' by '{artist}' found on Deezer, but no tracks could be retrieved, so not considered available for download.")
+                    is_available = await self._album_has_tracks(album_link.split('/')[-1])
+
+                if is_available:
+                    self._log_to_file(f"DeezerAPI: Album '{album_title}' by '{artist}' is available for download.")
+                else:
+                    self._log_to_file(f"DeezerAPI: Album '{album_title}' by '{artist}' found on Deezer, but has no tracks, so not considered available for download.")
             else:
+                if self.search_cache.get(album_cache_key) is None:
+                    # The search failed on request errors rather than finding nothing; don't cache that
+                    self._log_to_file(f"DeezerAPI: Album search for '{album_title}' by '{artist}' failed, not caching availability.", level=logging.WARNING)
+                    return False
+                is_available = False
                 self._log_to_file(f"DeezerAPI: Album '{album_title}' by '{artist}' not found on Deezer, so not available for download.")
         except Exception as e:
-            self._log_to_file(f"DeezerAPI: Error during availability check for album '{album_title}' by '{artist}': {e}. Not considered available.")
-            is_available = False
-        
-        # Cache only if available is True (effectively permanent cache for available albums)
-        if is_available:
-            self._availability_cache[cache_key] = True
-            self._log_to_file(f"DeezerAPI: Cached 'available' status for '{artist}' - '{album_title}'")
-        
+            self._log_to_file(f"DeezerAPI: Error during availability check for album '{album_title}' by '{artist}': {e}. Not considered available.", level=logging.WARNING)
+            return False
+
+        self.availability_cache.set(cache_key, is_available, ttl=DEEZER_AVAILABLE_TTL if is_available else DEEZER_UNAVAILABLE_TTL)
         return is_available
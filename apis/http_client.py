@@ -0,0 +1,153 @@
+import asyncio
+import atexit
+import json as json_module
+import threading
+import aiohttp
+import requests
+from multidict import CIMultiDict
+from config import (
+    HTTP_TIMEOUT, HTTP_CONNECT_TIMEOUT, HTTP_MAX_CONNECTIONS, HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_DNS_CACHE_TTL, HTTP_KEEPALIVE_TIMEOUT
+)
+
+# The error classes extend requests' exceptions so handlers written against requests keep working.
+class HttpRequestError(requests.exceptions.RequestException):
+    """A request could not be completed."""
+
+class HttpConnectionError(HttpRequestError, requests.exceptions.ConnectionError):
+    """The connection to the server failed."""
+
+class HttpTimeout(HttpRequestError, requests.exceptions.Timeout):
+    """The request timed out."""
+
+class HttpError(HttpRequestError, requests.exceptions.HTTPError):
+    """The server answered with an error status (raised by HttpResponse.raise_for_status)."""
+
+class HttpResponse:
+    """A fully read response, with the subset of the requests.Response interface the API classes use."""
+
+    def __init__(self, status_code, headers, content, url):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        charset = 'utf-8'
+        content_type = self.headers.get('Content-Type', '')
+        if 'charset=' in content_type:
+            charset = content_type.split('charset=')[-1].split(';')[0].strip() or charset
+        return self.content.decode(charset, errors='replace')
+
+    def json(self):
+        return json_module.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HttpError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+class _HttpClient:
+    """
+    Owns one aiohttp session (pooled keep-alive connections per host, cached DNS) on a dedicated event loop thread.
+    Callers on any event loop, or on plain threads, submit requests to it, so connections are reused
+    across the whole process even though the web UI runs each request on its own loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._session = None
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="http-client", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _get_session(self):
+        # Only called on the client loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_MAX_CONNECTIONS,
+                limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+            )
+        return self._session
+
+    @staticmethod
+    def _clean_params(params):
+        """Drops None values and stringifies the rest, like requests does."""
+        if not params:
+            return None
+        cleaned = []
+        for key, value in params.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            cleaned.extend((key, v if isinstance(v, str) else str(v)) for v in values if v is not None)
+        return cleaned
+
+    async def _request(self, method, url, params, headers, json, data, timeout, allow_redirects):
+        session = self._get_session()
+        options = {}
+        if timeout:
+            # Leaving timeout out entirely keeps the session default; passing None would disable it
+            options['timeout'] = aiohttp.ClientTimeout(total=timeout, connect=HTTP_CONNECT_TIMEOUT)
+        try:
+            async with session.request(method, url, params=self._clean_params(params), headers=headers, json=json,
+                                       data=data, allow_redirects=allow_redirects, **options) as response:
+                content = await response.read()
+                return HttpResponse(response.status, CIMultiDict(response.headers), content, str(response.url))
+        except asyncio.TimeoutError as e:
+            raise HttpTimeout(f"Timed out requesting {url}") from e
+        except aiohttp.ClientConnectionError as e:
+            raise HttpConnectionError(f"Connection error requesting {url}: {e}") from e
+        except aiohttp.ClientError as e:
+            raise HttpRequestError(f"Error requesting {url}: {e}") from e
+
+    def submit(self, method, url, params=None, headers=None, json=None, data=None, timeout=None, allow_redirects=True):
+        """Schedules a request on the client loop and returns a concurrent.futures.Future for its HttpResponse."""
+        return asyncio.run_coroutine_threadsafe(
+            self._request(method, url, params, headers, json, data, timeout, allow_redirects),
+            self._get_loop()
+        )
+
+    def close(self):
+        """Closes the session's pooled connections; registered to run at interpreter exit."""
+        if self._loop is None or self._session is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(timeout=5)
+        except Exception:
+            pass
+
+_client = _HttpClient()
+atexit.register(_client.close)
+
+async def request(method, url, **kwargs):
+    """
+    Performs an HTTP request through the shared client and returns an HttpResponse.
+    Accepts params, headers, json, data, timeout (seconds, overrides HTTP_TIMEOUT) and allow_redirects.
+    Cancelling the awaiting task cancels the request.
+    """
+    return await asyncio.wrap_future(_client.submit(method, url, **kwargs))
+
+async def get(url, **kwargs):
+    return await request("GET", url, **kwargs)
+
+async def post(url, **kwargs):
+    return await request("POST", url, **kwargs)
+
+def request_sync(method, url, **kwargs):
+    """Blocking version of request() for synchronous callers; still uses the shared connection pools."""
+    return _client.submit(method, url, **kwargs).result()
@@ -7,7 +7,10 @@ import asyncio
 import concurrent.futures
 import hashlib
 from apis.deezer_api import DeezerAPI
+from apis.listenbrainz_api import ListenBrainzAPI
+from apis import http_client
 from config import LASTFM_ENABLED as GLOBAL_LASTFM_ENABLED
+from config import ROOT_LB, TOKEN_LB, USER_LB, LISTENBRAINZ_ENABLED
 
 class LastFmAPI:
     def __init__(self, api_key, api_secret, username, password, session_key, lastfm_enabled):
@@ -25,17 +28,10 @@ class LastFmAPI:
         """
         for attempt in range(max_retries):
             try:
-                if method == "GET":
-                    response = requests.get(url, headers=headers, params=params)
-                elif method == "POST":
-                    if json:
-                        response = requests.post(url, headers=headers, json=json)
-                    elif data:
-                        response = requests.post(url, headers=headers, data=data)
-                    else:
-                        response = requests.post(url, headers=headers)
-                elif method == "HEAD":
-                    response = requests.head(url, headers=headers, params=params)
+                if method == "POST":
+                    response = http_client.request_sync(method, url, headers=headers, json=json, data=data)
+                else:
+                    response = http_client.request_sync(method, url, headers=headers, params=params)
                 response.raise_for_status()
                 return response
             except requests.exceptions.ConnectionError as e:
@@ -266,9 +262,16 @@ class LastFmAPI:
             }
             details = album_details[i]
             if details:
+                # Carry the resolution along so the downloader doesn't search Deezer again
+                song["deezer_id"] = details.get("deezer_id")
                 song["album_art"] = details.get("album_art")
                 song["album"] = details.get("album", song["album"])
+                song["release_date"] = details.get("release_date") or song["release_date"]
             songs.append(song)
+
+        # Recording MBIDs (for tagging and feedback) for the whole list in a few batched requests
+        if LISTENBRAINZ_ENABLED and ROOT_LB:
+            await ListenBrainzAPI(ROOT_LB, TOKEN_LB, USER_LB, LISTENBRAINZ_ENABLED).enrich_recommendations(songs)
         return songs
 
     def love_track(self, track, artist):
@@ -2,22 +2,39 @@ import requests
 import time
 import os
 import asyncio
-import concurrent.futures
+import collections
+import json
 import sys
-from streamrip.client import DeezerClient
-from mutagen.id3 import ID3, COMM
-from apis.deezer_api import DeezerAPI
+import threading
+from apis import http_client
 from config import PLAYLIST_HISTORY_FILE, FRESH_RELEASES_CACHE_DURATION
+from config import FRESH_RELEASES_STALE_DURATION, FRESH_RELEASES_DISK_CACHE, FRESH_RELEASES_REFRESH_INTERVAL
 
 class ListenBrainzAPI:
+    # Recordings per request to the bulk metadata endpoints
+    metadata_batch_size = 50
+
+    # Fresh releases are cached process-wide, since every web request builds its own instance.
+    # Entries older than this fraction of FRESH_RELEASES_CACHE_DURATION are refreshed in the background.
+    fresh_releases_refresh_ahead = 0.8
+    _fresh_releases_lock = threading.Lock()
+    _fresh_releases_entries = {}
+    _fresh_releases_refreshing = set()
+    _fresh_releases_refresher = None
+
     def __init__(self, root_lb, token_lb, user_lb, listenbrainz_enabled):
         self._root_lb = root_lb
         self._token_lb = token_lb
         self._user_lb = user_lb
         self._listenbrainz_enabled = listenbrainz_enabled
         self.playlist_history_file = PLAYLIST_HISTORY_FILE
-        self._fresh_releases_cache = None
-        self._fresh_releases_cache_timestamp = 0
+        # Conditional-request validators for the recommendations list, kept next to the history file
+        self.playlist_validators_file = os.path.splitext(PLAYLIST_HISTORY_FILE)[0] + ".validators.json"
+        self._pending_playlist_validators = None
+        self._probe_result = None
+        self._musicbrainz_api = None
+        # Playlist responses for the lifetime of this instance (one run), keyed by URL and params
+        self._playlist_cache = {}
 
     @property
     def root_lb(self):
@@ -51,43 +68,121 @@ class ListenBrainzAPI:
         except OSError as e:
             print(f"Error saving playlist name to file: {e}")
 
+    def _load_playlist_validators(self):
+        """Reads the validators saved by the last run, or an empty dict."""
+        try:
+            with open(self.playlist_validators_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_playlist_validators(self):
+        """Saves the validators of the recommendations list fetched by probe_playlist_changed, if any."""
+        if not self._pending_playlist_validators:
+            return
+        try:
+            with open(self.playlist_validators_file, "w") as f:
+                json.dump(self._pending_playlist_validators, f)
+        except OSError as e:
+            print(f"Error saving playlist validators to file: {e}")
+
+    def _find_weekly_exploration(self, playlist_json):
+        """Returns the 'Weekly Exploration' entry of a recommendations list, or None."""
+        for playlist in playlist_json["playlists"]:
+            if playlist["playlist"]["title"].startswith(f"Weekly Exploration for {self.user_lb}"):
+                return playlist["playlist"]
+        return None
+
+    async def probe_playlist_changed(self):
+        """
+        Cheap check for a new recommendation playlist: a conditional GET of the recommendations list
+        (If-None-Match/If-Modified-Since), then a comparison of the Weekly Exploration playlist's
+        identifier and last_modified_at with the validators saved by the last run.
+        Returns False only when the playlist is known to be unchanged. The fetched list is kept in the
+        run cache, so has_playlist_changed doesn't request it again.
+        """
+        if self._probe_result is not None:
+            return self._probe_result
+
+        validators = self._load_playlist_validators()
+        url = f"{self.root_lb}/1/user/{self.user_lb}/playlists/recommendations"
+        headers = dict(self.auth_header_lb)
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        response = await self._make_request_with_retries(method="GET", url=url, headers=headers)
+        if response.status_code == 304:
+            self._probe_result = False
+            return False
+
+        playlist_json = response.json()
+        self._playlist_cache[(url, ())] = playlist_json
+
+        weekly = self._find_weekly_exploration(playlist_json) or {}
+        playlist_extension = weekly.get("extension", {}).get("https://musicbrainz.org/doc/jspf#playlist", {})
+        self._pending_playlist_validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'identifier': weekly.get("identifier"),
+            'last_modified_at': playlist_extension.get("last_modified_at")
+        }
+
+        self._probe_result = not weekly.get("identifier") or \
+            (weekly.get("identifier"), playlist_extension.get("last_modified_at")) != \
+            (validators.get('identifier'), validators.get('last_modified_at'))
+        return self._probe_result
+
     async def has_playlist_changed(self):
-        """Checks if the playlist has changed since the last run asynchronously."""
-        current_playlist_name = await self.get_latest_playlist_name()
+        """
+        Checks if the playlist has changed since the last run asynchronously.
+        Returns the new playlist JSON (to pass on to get_listenbrainz_recommendations) if it changed, otherwise False.
+        """
+        if not await self.probe_playlist_changed():
+            return False
+
+        latest_playlist = await self.get_latest_playlist()
+        if latest_playlist is None:
+            return False
+
+        current_playlist_name = latest_playlist['playlist']['title']
         last_playlist_name = self._get_last_playlist_name()
+        self._save_playlist_validators()
 
         if current_playlist_name == last_playlist_name:
             return False
 
         self._save_playlist_name(current_playlist_name)
-        return True
+        return latest_playlist
 
-    async def get_latest_playlist_name(self):
-        """Retrieves the name of the latest *recommendation* playlist from ListenBrainz asynchronously."""
+    async def get_latest_playlist(self):
+        """Retrieves the latest *recommendation* playlist (full JSON, with tracks) from ListenBrainz asynchronously."""
         playlist_json = await self._get_recommendation_playlist(self.user_lb)
 
-        for playlist in playlist_json["playlists"]:
-            if playlist["playlist"]["title"].startswith(f"Weekly Exploration for {self.user_lb}"):
-                latest_playlist_mbid = playlist["playlist"]["identifier"].split("/")[-1]
-                latest_playlist = await self._get_playlist_by_mbid(latest_playlist_mbid)
-                return latest_playlist['playlist']['title']
+        weekly = self._find_weekly_exploration(playlist_json)
+        if weekly:
+            latest_playlist_mbid = weekly["identifier"].split("/")[-1]
+            return await self._get_playlist_by_mbid(latest_playlist_mbid)
 
         print("Error: 'Weekly Exploration' playlist not found.")
         return None
 
+    async def get_latest_playlist_name(self):
+        """Retrieves the name of the latest *recommendation* playlist from ListenBrainz asynchronously."""
+        latest_playlist = await self.get_latest_playlist()
+        return latest_playlist['playlist']['title'] if latest_playlist else None
+
     async def _make_request_with_retries(self, method, url, headers, params=None, json=None, max_retries=5, retry_delay=5):
         """
         Makes an HTTP request with retry logic for connection errors, asynchronously.
         """
-        loop = asyncio.get_event_loop()
         for attempt in range(max_retries):
             try:
-                if method == "GET":
-                    response = await loop.run_in_executor(None, lambda: requests.get(url, headers=headers, params=params))
-                elif method == "POST":
-                    response = await loop.run_in_executor(None, lambda: requests.post(url, headers=headers, json=json))
-                elif method == "HEAD":
-                    response = await loop.run_in_executor(None, lambda: requests.head(url, headers=headers, params=params))
+                if method == "POST":
+                    response = await http_client.request(method, url, headers=headers, json=json)
+                else:
+                    response = await http_client.request(method, url, headers=headers, params=params)
                 response.raise_for_status()
                 return response
             except requests.exceptions.ConnectionError as e:
@@ -110,80 +205,169 @@ class ListenBrainzAPI:
                 raise
         return None
 
+    async def _get_cached_playlist_json(self, url, params):
+        """GETs a playlist endpoint once per instance; later calls in the same run reuse the parsed JSON."""
+        cache_key = (url, tuple(sorted(params.items())))
+        if cache_key not in self._playlist_cache:
+            response = await self._make_request_with_retries(
+                method="GET",
+                url=url,
+                params=params,
+                headers=self.auth_header_lb,
+            )
+            self._playlist_cache[cache_key] = response.json()
+        return self._playlist_cache[cache_key]
+
     async def _get_recommendation_playlist(self, username, **params):
         """Fetches the recommendation playlist from ListenBrainz asynchronously."""
-        response = await self._make_request_with_retries(
-            method="GET",
-            url=f"{self.root_lb}/1/user/{username}/playlists/recommendations",
-            params=params,
-            headers=self.auth_header_lb,
-        )
-        return response.json()
+        return await self._get_cached_playlist_json(f"{self.root_lb}/1/user/{username}/playlists/recommendations", params)
 
     async def _get_playlist_by_mbid(self, playlist_mbid, **params):
         """Fetches a playlist by its MBID from ListenBrainz asynchronously."""
-        response = await self._make_request_with_retries(
-            method="GET",
-            url=f"{self.root_lb}/1/playlist/{playlist_mbid}",
-            params=params,
-            headers=self.auth_header_lb,
-        )
-        return response.json()
+        return await self._get_cached_playlist_json(f"{self.root_lb}/1/playlist/{playlist_mbid}", params)
+
+    @property
+    def musicbrainz_api(self):
+        """The MusicBrainz client (shared rate limit, persistent cache); imported lazily to keep this module light."""
+        if self._musicbrainz_api is None:
+            from apis.musicbrainz_api import MusicBrainzAPI
+            self._musicbrainz_api = MusicBrainzAPI()
+        return self._musicbrainz_api
 
     async def get_recording_mbid_from_track(self, artist, title):
         """Fetches recording MBID from MusicBrainz using artist and title."""
-        headers = {
-            'User-Agent': 'Re-command/1.0 ( https://github.com/z-a-f/re-command )'
-        }
-        url = f"https://musicbrainz.org/ws/2/recording/?query=artist:\"{artist}\" AND recording:\"{title}\"&fmt=json"
-        try:
-            response = await self._make_request_with_retries(
-                method="GET",
-                url=url,
-                headers=headers,
-                retry_delay=2
-            )
-            data = response.json()
-            if data.get("recordings") and len(data["recordings"]) > 0:
-                # Recordings are sorted by score descending, so the first is likely the best match.
-                return data["recordings"][0].get("id")
-        except Exception as e:
-            print(f"Error getting MBID for {artist} - {title}: {e}", file=sys.stderr)
-        return None
+        return await self.musicbrainz_api.get_recording_mbid(artist, title)
 
     async def get_track_info(self, recording_mbid):
-        """Fetches track information from MusicBrainz asynchronously."""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        url = f"https://musicbrainz.org/ws/2/recording/{recording_mbid}?fmt=json&inc=artist-credits+releases"
+        """Fetches track information (artist, title, album, release_date, release_mbid) from MusicBrainz asynchronously."""
+        return await self.musicbrainz_api.get_recording_info(recording_mbid)
 
-        try:
-            response = await self._make_request_with_retries(
-                method="GET",
-                url=url,
-                headers=headers,
-                retry_delay=2
-            )
-            data = response.json()
-            artist_credit = data["artist-credit"][0]
-            artist = artist_credit["name"]
-            title = data["title"]
-            if data["releases"]:
-                album = data["releases"][0]["title"]
-                release_date = data["releases"][0].get("date")
-                release_mbid = data["releases"][0]["id"]
-            else:
-                album = "Unknown Album"
-                release_date = None
-                release_mbid = None
-            return artist, title, album, release_date, release_mbid
-        except requests.exceptions.RequestException as e:
-            print(f"Error getting track info for {recording_mbid}: {e}", file=sys.stderr)
-            return None, None, None, None, None
-
-    async def get_listenbrainz_recommendations(self):
-        """Fetches recommended songs from ListenBrainz and returns them as a list."""
+    @property
+    def _metadata_headers(self):
+        # The metadata endpoints don't require a token, so enrichment also works with ListenBrainz disabled
+        return self.auth_header_lb if self.token_lb else {}
+
+    async def _lookup_recordings(self, tracks):
+        """
+        Matches (artist, title) pairs to recordings with POST /1/metadata/lookup/, in batches.
+        Returns a list aligned with tracks holding each lookup result (recording_mbid, release_mbid, ...) or None.
+        """
+        results = [None] * len(tracks)
+        for start in range(0, len(tracks), self.metadata_batch_size):
+            batch = tracks[start:start + self.metadata_batch_size]
+            payload = {"recordings": [{"artist_name": artist, "recording_name": title} for artist, title in batch]}
+            try:
+                response = await self._make_request_with_retries(
+                    method="POST",
+                    url=f"{self.root_lb}/1/metadata/lookup/",
+                    headers=self._metadata_headers,
+                    json=payload
+                )
+                items = response.json()
+            except Exception as e:
+                print(f"Error looking up recordings on ListenBrainz: {e}", file=sys.stderr)
+                continue
+
+            if isinstance(items, dict):
+                items = items.get("recordings", [])
+            for position, item in enumerate(items):
+                index = item.get("index")
+                if index is None:
+                    # Without an index, positions only line up if every recording got a result
+                    if len(items) != len(batch):
+                        break
+                    index = position
+                if item.get("recording_mbid") and 0 <= index < len(batch):
+                    results[start + index] = item
+        return results
+
+    async def bulk_resolve_recordings(self, recording_mbids):
+        """
+        Fetches metadata for many recording MBIDs with POST /1/metadata/recording/, in batches.
+        Returns a dict of recording MBID -> record (recording_mbid, artist, title, album, release_mbid,
+        release_year, caa_id, caa_release_mbid); MBIDs ListenBrainz doesn't know are left out.
+        """
+        recording_mbids = list(dict.fromkeys(mbid for mbid in recording_mbids if mbid))
+        records = {}
+        for start in range(0, len(recording_mbids), self.metadata_batch_size):
+            batch = recording_mbids[start:start + self.metadata_batch_size]
+            try:
+                response = await self._make_request_with_retries(
+                    method="POST",
+                    url=f"{self.root_lb}/1/metadata/recording/",
+                    headers=self._metadata_headers,
+                    json={"recording_mbids": batch, "inc": "artist release"}
+                )
+                metadata = response.json()
+            except Exception as e:
+                print(f"Error fetching recording metadata from ListenBrainz: {e}", file=sys.stderr)
+                continue
+
+            for mbid, item in metadata.items():
+                release = item.get("release") or {}
+                records[mbid] = {
+                    "recording_mbid": mbid,
+                    "artist": (item.get("artist") or {}).get("name"),
+                    "title": (item.get("recording") or {}).get("name"),
+                    "album": release.get("name"),
+                    "release_mbid": release.get("mbid"),
+                    "release_year": release.get("year"),
+                    "caa_id": release.get("caa_id"),
+                    "caa_release_mbid": release.get("caa_release_mbid")
+                }
+        return records
+
+    async def bulk_resolve_tracks(self, tracks):
+        """
+        Resolves many (artist, title) pairs to recording and release metadata in a few batched requests.
+        Returns a list aligned with tracks of records (see bulk_resolve_recordings) or None when unmatched.
+        """
+        lookups = await self._lookup_recordings(tracks)
+        metadata = await self.bulk_resolve_recordings([lookup["recording_mbid"] for lookup in lookups if lookup])
+
+        records = []
+        for lookup in lookups:
+            if not lookup:
+                records.append(None)
+                continue
+            record = metadata.get(lookup["recording_mbid"]) or {"recording_mbid": lookup["recording_mbid"]}
+            record.setdefault("artist", lookup.get("artist_credit_name"))
+            record.setdefault("title", lookup.get("recording_name"))
+            record["album"] = record.get("album") or lookup.get("release_name")
+            record["release_mbid"] = record.get("release_mbid") or lookup.get("release_mbid")
+            records.append(record)
+        return records
+
+    async def enrich_recommendations(self, recommendations):
+        """
+        Fills in recording_mbid, caa_release_mbid/caa_id and a missing album for recommendations that
+        lack an MBID (Last.fm, LLM), using the bulk resolver. Only missing fields are set, so an album
+        resolved on Deezer is kept. Updates the dicts in place and returns them; a no-op when
+        ListenBrainz isn't configured.
+        """
+        pending = [rec for rec in recommendations if not rec.get("recording_mbid")]
+        if not pending or not self._listenbrainz_enabled or not self._root_lb:
+            return recommendations
+
+        records = await self.bulk_resolve_tracks([(rec["artist"], rec["title"]) for rec in pending])
+        for rec, record in zip(pending, records):
+            if not record:
+                continue
+            rec["recording_mbid"] = record["recording_mbid"]
+            if not rec.get("caa_release_mbid"):
+                rec["caa_release_mbid"] = record.get("caa_release_mbid") or record.get("release_mbid")
+            if not rec.get("caa_id"):
+                rec["caa_id"] = record.get("caa_id")
+            if record.get("album") and rec.get("album") in (None, "", "Unknown Album"):
+                rec["album"] = record["album"]
+        print(f"Resolved {sum(1 for record in records if record)} of {len(pending)} recommendations on ListenBrainz.")
+        return recommendations
+
+    async def get_listenbrainz_recommendations(self, latest_playlist=None):
+        """
+        Fetches recommended songs from ListenBrainz and returns them as a list.
+        latest_playlist can be the playlist JSON already returned by has_playlist_changed.
+        """
         if not self._listenbrainz_enabled:
             return []
 
@@ -200,26 +384,13 @@ class ListenBrainzAPI:
         print("                                                                                                                            ")
 
         try:
-            latest_playlist_name = await self.get_latest_playlist_name()
-
-            if latest_playlist_name is None:
-                print("Error: Could not retrieve the latest ListenBrainz playlist name.")
-                return []
-
-            playlist_json = await self._get_recommendation_playlist(self.user_lb)
-
-            latest_playlist_mbid = None
-            for playlist in playlist_json["playlists"]:
-                if playlist["playlist"]["title"] == latest_playlist_name:
-                    latest_playlist_mbid = playlist["playlist"]["identifier"].split("/")[-1]
-                    break
+            if latest_playlist is None:
+                latest_playlist = await self.get_latest_playlist()
 
-            if latest_playlist_mbid is None:
-                print(f"Error: Could not find ListenBrainz playlist with name '{latest_playlist_name}'.")
+            if latest_playlist is None:
+                print("Error: Could not retrieve the latest ListenBrainz playlist.")
                 return []
 
-            latest_playlist = await self._get_playlist_by_mbid(latest_playlist_mbid)
-
             tracks = latest_playlist["playlist"]["track"]
             
             # Create a list of tasks for processing each track
@@ -295,17 +466,42 @@ class ListenBrainzAPI:
             "caa_id": caa_id
         }
 
-    async def get_fresh_releases(self, sort="release_date", past=True, future=False):
-        """Fetches fresh releases for the user from ListenBrainz asynchronously."""
+    async def get_fresh_releases(self, sort="release_date", past=True, future=False, check_availability=None):
+        """
+        Fetches fresh releases for the user from ListenBrainz asynchronously.
+
+        Results are cached process-wide (and on disk with FRESH_RELEASES_DISK_CACHE) for
+        FRESH_RELEASES_CACHE_DURATION seconds. In a long-running process that started the refresher
+        (the web UI), entries close to expiry are refreshed in the background and expired ones are
+        still served for up to FRESH_RELEASES_STALE_DURATION seconds while that refresh runs. One-shot
+        runs never get stale data: once the TTL has passed they fetch synchronously.
+
+        check_availability: optional async callable(artist, album) -> bool; when given, each release
+        gets an 'is_available_on_deezer' flag, cached together with the releases.
+        """
+        key = (self.root_lb, self.user_lb, sort, past, future, check_availability is not None)
+        entry = self._get_fresh_releases_entry(key, check_availability)
+        if entry:
+            age = time.time() - entry['fetched_at']
+            # Background refreshes only land if the process outlives them, so only the web UI serves stale data
+            serve_stale = self._fresh_releases_refresher is not None
+            max_age = FRESH_RELEASES_CACHE_DURATION + (FRESH_RELEASES_STALE_DURATION if serve_stale else 0)
+            if age < max_age:
+                if serve_stale and age >= FRESH_RELEASES_CACHE_DURATION * self.fresh_releases_refresh_ahead:
+                    self._refresh_fresh_releases_in_background(key, check_availability)
+                print(f"Returning cached fresh releases (cached at {time.ctime(entry['fetched_at'])})")
+                return entry['data']
+
+        return await self._fetch_fresh_releases(key, check_availability)
+
+    async def _fetch_fresh_releases(self, key, check_availability=None):
+        """Fetches fresh releases (and their availability flags) from ListenBrainz and stores them in the cache."""
+        _, _, sort, past, future, _ = key
         params = {
             "sort": sort,
             "past": str(past).lower(),
             "future": str(future).lower()
         }
-        
-        if self._fresh_releases_cache and (time.time() - self._fresh_releases_cache_timestamp) < FRESH_RELEASES_CACHE_DURATION:
-            print(f"Returning cached fresh releases (cached at {time.ctime(self._fresh_releases_cache_timestamp)})")
-            return self._fresh_releases_cache
 
         print("Fetching fresh releases from ListenBrainz API...")
         response = await self._make_request_with_retries(
@@ -324,41 +520,202 @@ class ListenBrainzAPI:
         # Album art is fetched by the frontend
         for release in latest_10_releases:
             release['album_art'] = None 
-        
+
+        if check_availability:
+            availability = await asyncio.gather(
+                *(check_availability(release['artist_credit_name'], release['release_name']) for release in latest_10_releases),
+                return_exceptions=True
+            )
+            for release, is_available in zip(latest_10_releases, availability):
+                release['is_available_on_deezer'] = is_available is True
+
         result = {'payload': {'releases': latest_10_releases}}
-        self._fresh_releases_cache = result
-        self._fresh_releases_cache_timestamp = time.time()
-        print(f"Cached fresh releases at {time.ctime(self._fresh_releases_cache_timestamp)}")
-        
+        self._store_fresh_releases_entry(key, result, check_availability)
         return result
 
+    @classmethod
+    def _disk_cache_key(cls, key):
+        return "|".join(str(part) for part in key)
+
+    @classmethod
+    def _fresh_releases_disk_cache(cls):
+        # Imported lazily: utils pulls in the download stack, which the cron probe avoids loading
+        from utils import PersistentCache
+        return PersistentCache("fresh_releases")
+
+    def _get_fresh_releases_entry(self, key, check_availability=None):
+        """Returns the cached {'data', 'fetched_at'} for key from memory, then disk, or None."""
+        with self._fresh_releases_lock:
+            entry = self._fresh_releases_entries.get(key)
+        if entry or not FRESH_RELEASES_DISK_CACHE:
+            return entry
+
+        entry = self._fresh_releases_disk_cache().get(self._disk_cache_key(key))
+        if entry:
+            with self._fresh_releases_lock:
+                self._fresh_releases_entries.setdefault(key, {**entry, 'api': self, 'check_availability': check_availability})
+        return entry
+
+    def _store_fresh_releases_entry(self, key, data, check_availability):
+        fetched_at = time.time()
+        with self._fresh_releases_lock:
+            self._fresh_releases_entries[key] = {
+                'data': data, 'fetched_at': fetched_at, 'api': self, 'check_availability': check_availability
+            }
+        if FRESH_RELEASES_DISK_CACHE:
+            self._fresh_releases_disk_cache().set(
+                self._disk_cache_key(key), {'data': data, 'fetched_at': fetched_at},
+                ttl=FRESH_RELEASES_CACHE_DURATION + FRESH_RELEASES_STALE_DURATION
+            )
+        print(f"Cached fresh releases at {time.ctime(fetched_at)}")
+
+    def _refresh_fresh_releases_in_background(self, key, check_availability):
+        """Refetches a cache entry on a background thread, unless a refresh for it is already running."""
+        with self._fresh_releases_lock:
+            if key in self._fresh_releases_refreshing:
+                return
+            self._fresh_releases_refreshing.add(key)
+
+        def refresh():
+            try:
+                asyncio.run(self._fetch_fresh_releases(key, check_availability))
+            except Exception as e:
+                print(f"Error refreshing fresh releases in the background: {e}", file=sys.stderr)
+            finally:
+                with self._fresh_releases_lock:
+                    self._fresh_releases_refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="fresh-releases-refresh", daemon=True).start()
+
+    @classmethod
+    def start_fresh_releases_refresher(cls, interval=None):
+        """
+        Starts a daemon thread that periodically refreshes cached fresh releases close to expiry, so
+        page loads keep hitting a warm cache, and lets get_fresh_releases serve stale entries while they
+        refresh. Only for long-running processes. Safe to call more than once.
+        """
+        interval = interval or FRESH_RELEASES_REFRESH_INTERVAL
+        with cls._fresh_releases_lock:
+            if cls._fresh_releases_refresher is not None:
+                return
+            cls._fresh_releases_refresher = threading.Thread(
+                target=cls._run_fresh_releases_refresher, args=(interval,), name="fresh-releases-refresher", daemon=True
+            )
+        cls._fresh_releases_refresher.start()
+
+    @classmethod
+    def _run_fresh_releases_refresher(cls, interval):
+        while True:
+            time.sleep(interval)
+            now = time.time()
+            with cls._fresh_releases_lock:
+                entries = list(cls._fresh_releases_entries.items())
+            for key, entry in entries:
+                if now - entry['fetched_at'] >= FRESH_RELEASES_CACHE_DURATION * cls.fresh_releases_refresh_ahead:
+                    entry['api']._refresh_fresh_releases_in_background(key, entry['check_availability'])
+
+    @staticmethod
+    def _listen_identity(listen):
+        metadata = listen.get('track_metadata', {})
+        return (listen.get('listened_at'), listen.get('recording_msid'), metadata.get('artist_name'), metadata.get('track_name'))
+
+    async def iter_listens(self, min_ts, max_ts=None, page_size=1000):
+        """
+        Yields the user's listens from newest to oldest, down to min_ts, paging through /listens
+        with a max_ts cursor (ListenBrainz returns at most 1000 listens per request).
+        """
+        url = f"{self.root_lb}/1/user/{self.user_lb}/listens"
+        cursor = max_ts or int(time.time())
+        # Listens at the oldest timestamp yielded so far; a page can end in the middle of them
+        boundary_ts, boundary_seen = None, set()
+
+        while cursor > min_ts:
+            params = {"max_ts": cursor, "min_ts": min_ts, "count": page_size}
+            response = await self._make_request_with_retries("GET", url, headers=self.auth_header_lb, params=params)
+            listens = response.json().get('payload', {}).get('listens', [])
+            if not listens:
+                return
+
+            for listen in listens:
+                listened_at = listen.get('listened_at', 0)
+                if listened_at <= min_ts:
+                    return
+                identity = self._listen_identity(listen)
+                if listened_at == boundary_ts:
+                    if identity in boundary_seen:
+                        continue
+                    boundary_seen.add(identity)
+                else:
+                    boundary_ts, boundary_seen = listened_at, {identity}
+                yield listen
+
+            if len(listens) < page_size:
+                return
+            oldest = listens[-1].get('listened_at', 0)
+            # max_ts is exclusive: ask again from the oldest timestamp so listens sharing it on the next
+            # page aren't lost (the ones already seen are skipped). If the whole page has that timestamp,
+            # more listens share it than fit in a page and asking again would return the same page.
+            if listens[0].get('listened_at', 0) == oldest:
+                cursor = oldest
+            else:
+                cursor = oldest + 1
+
+    async def get_weekly_listening_summary(self):
+        """
+        Aggregates the last 7 days of listens into play counts per track and per artist, sorted by
+        plays. Only the counters are kept in memory, however many listens the week has.
+        """
+        one_week_ago = int(time.time()) - (7 * 24 * 60 * 60)
+        track_plays = collections.Counter()
+        artist_plays = collections.Counter()
+        names = {}
+        total_listens = 0
+
+        async for listen in self.iter_listens(one_week_ago):
+            metadata = listen.get('track_metadata', {})
+            artist = metadata.get('artist_name')
+            track = metadata.get('track_name')
+            if not artist or not track:
+                continue
+            artist_key = artist.lower()
+            track_key = (artist_key, track.lower())
+            names.setdefault(artist_key, artist)
+            names.setdefault(track_key, track)
+            artist_plays[artist_key] += 1
+            track_plays[track_key] += 1
+            total_listens += 1
+
+        return {
+            'total_listens': total_listens,
+            'tracks': [
+                {'artist': names[artist_key], 'track': names[(artist_key, track_key)], 'plays': plays}
+                for (artist_key, track_key), plays in track_plays.most_common()
+            ],
+            'artists': [
+                {'artist': names[artist_key], 'plays': plays}
+                for artist_key, plays in artist_plays.most_common()
+            ]
+        }
+
     async def get_weekly_scrobbles(self, count=200):
-        """Fetches the user's scrobbles from the last 7 days."""
+        """
+        Returns the user's `count` most played tracks of the last 7 days, each with its play count
+        ('plays') and the week's total plays of its artist ('artist_plays').
+        """
         if not self._listenbrainz_enabled:
             return []
 
-        now = int(time.time())
-        one_week_ago = now - (7 * 24 * 60 * 60)
-
-        params = {
-            "min_ts": one_week_ago,
-            "max_ts": now,
-            "count": count
-        }
-        url = f"{self.root_lb}/1/user/{self.user_lb}/listens"
-        
         try:
-            response = await self._make_request_with_retries("GET", url, headers=self.auth_header_lb, params=params)
-            data = response.json()
-            listens = data.get('payload', {}).get('listens', [])
-            scrobbles = [{'artist': listen['track_metadata']['artist_name'], 'track': listen['track_metadata']['track_name']} for listen in listens]
-            return scrobbles
+            summary = await self.get_weekly_listening_summary()
+            artist_plays = {artist['artist'].lower(): artist['plays'] for artist in summary['artists']}
+            return [
+                {**track, 'artist_plays': artist_plays.get(track['artist'].lower(), track['plays'])}
+                for track in summary['tracks'][:count]
+            ]
         except Exception as e:
             print(f"Error fetching weekly scrobbles from ListenBrainz: {e}", file=sys.stderr)
             return []
 
-
-
     async def submit_feedback(self, recording_mbid, score):
         """Submits feedback for a recording to ListenBrainz."""
         payload = {"recording_mbid": recording_mbid, "score": score}
@@ -1,8 +1,11 @@
 import google.generativeai as genai
-import requests
 import json
 import sys
 import re
+from apis import http_client
+
+# LLM completions can take minutes, well past the default HTTP timeout
+LLM_REQUEST_TIMEOUT = 300
 
 class LlmAPI:
     def __init__(self, provider, gemini_api_key=None, openrouter_api_key=None, llama_api_key=None, model_name=None, base_url=None):
@@ -40,6 +43,7 @@ class LlmAPI:
         """Builds the prompt for the LLM."""
         prompt = f"""
 You are a music expert assistant. Based on the following list of recently listened tracks in JSON format, please recommend 25 new songs that this listener might like.
+Where given, "plays" is how often the track was played this week and "artist_plays" how often any track by its artist was, so weigh the most played artists and tracks more.
 The recommendations should be for a user who enjoys the artists and genres represented in the listening history. Only recommend tracks that are not already in the listening history.
 
 My listening history:
@@ -58,7 +62,7 @@ Example response format:
     def get_recommendations(self, scrobbles):
         """
         Gets music recommendations from the configured LLM provider.
-        'scrobbles' is a list of dicts with 'artist' and 'track'.
+        'scrobbles' is a list of dicts with 'artist', 'track' and (optionally) 'plays' and 'artist_plays'.
         """
         if not scrobbles:
             return []
@@ -76,7 +80,7 @@ Example response format:
                     "model": openrouter_model,
                     "messages": [{"role": "user", "content": prompt}]
                 }
-                api_response = requests.post(self.openrouter_url, headers=self.headers, json=data)
+                api_response = http_client.request_sync("POST", self.openrouter_url, headers=self.headers, json=data, timeout=LLM_REQUEST_TIMEOUT)
                 api_response.raise_for_status()
                 response_text = api_response.json()['choices'][0]['message']['content']
             elif self.provider == 'llama':
@@ -88,7 +92,7 @@ Example response format:
                     "temperature": 0.7,
                     "max_tokens": 1000
                 }
-                api_response = requests.post(self.llama_url, headers=self.headers, json=data)
+                api_response = http_client.request_sync("POST", self.llama_url, headers=self.headers, json=data, timeout=LLM_REQUEST_TIMEOUT)
                 if api_response.status_code != 200:
                     print(f"LLM API Error: {api_response.status_code} {api_response.text}", file=sys.stderr)
                 api_response.raise_for_status()
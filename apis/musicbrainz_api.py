@@ -0,0 +1,117 @@
+import asyncio
+import concurrent.futures
+import sys
+import threading
+import requests
+from apis import http_client
+from apis.rate_limiter import RateLimiter
+from config import MUSICBRAINZ_RATE_LIMIT_REQUESTS, MUSICBRAINZ_RATE_LIMIT_PERIOD, MUSICBRAINZ_CACHE_TTL, MUSICBRAINZ_CACHE_MISS_TTL
+from utils import PersistentCache
+
+class MusicBrainzAPI:
+    """
+    MusicBrainz lookups (artist/title -> recording MBID, MBID -> release info) behind a process-wide
+    token bucket, a persistent cache and in-flight request coalescing. Callers can submit many lookups
+    at once: the limiter paces them to MusicBrainz's 1 request per second, and cache hits return
+    without waiting.
+    """
+    base_url = "https://musicbrainz.org/ws/2"
+    headers = {
+        'User-Agent': 'Re-command/1.0 ( https://github.com/z-a-f/re-command )'
+    }
+
+    # Shared by every instance so the rate limit holds across the whole process
+    rate_limiter = RateLimiter("musicbrainz", 1, MUSICBRAINZ_RATE_LIMIT_REQUESTS, MUSICBRAINZ_RATE_LIMIT_PERIOD)
+    _inflight_lock = threading.Lock()
+    _inflight = {}
+
+    def __init__(self):
+        self.cache = PersistentCache("musicbrainz")
+
+    async def _make_request_with_retries(self, url, params, max_retries=3):
+        """GETs a MusicBrainz endpoint through the shared limiter, backing everyone off on 503 (rate limited)."""
+        for attempt in range(max_retries):
+            async with self.rate_limiter:
+                response = await http_client.get(url, params=params, headers=self.headers)
+            if response.status_code == 503 and attempt < max_retries - 1:
+                retry_after = response.headers.get('Retry-After')
+                self.rate_limiter.record_throttle(float(retry_after) if retry_after and retry_after.isdigit() else None)
+                continue
+            response.raise_for_status()
+            self.rate_limiter.record_success()
+            return response.json()
+        return None
+
+    async def _coalesced(self, cache_key, fetch):
+        """
+        Returns the cached value for cache_key, or runs fetch() once for all concurrent callers
+        (on any thread or event loop) and caches its result. fetch returns (value, ttl); a None ttl
+        means the result must not be cached (e.g. the lookup failed).
+        """
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached.get('value')
+
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = concurrent.futures.Future()
+                self._inflight[cache_key] = future
+
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            value, ttl = await fetch()
+            if ttl is not None:
+                self.cache.set(cache_key, {'value': value}, ttl=ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+
+    async def get_recording_mbid(self, artist, title):
+        """Returns the best matching recording MBID for artist/title, or None."""
+        async def fetch():
+            try:
+                data = await self._make_request_with_retries(
+                    f"{self.base_url}/recording/",
+                    {"query": f'artist:"{artist}" AND recording:"{title}"', "fmt": "json"}
+                )
+            except requests.exceptions.RequestException as e:
+                print(f"Error getting MBID for {artist} - {title}: {e}", file=sys.stderr)
+                return None, None
+            if data and data.get("recordings"):
+                # Recordings are sorted by score descending, so the first is likely the best match.
+                return data["recordings"][0].get("id"), MUSICBRAINZ_CACHE_TTL
+            return None, MUSICBRAINZ_CACHE_MISS_TTL
+
+        return await self._coalesced(f"recording:{artist.lower()}|{title.lower()}", fetch)
+
+    async def get_recording_info(self, recording_mbid):
+        """Returns (artist, title, album, release_date, release_mbid) for a recording MBID; all None on errors."""
+        async def fetch():
+            try:
+                data = await self._make_request_with_retries(
+                    f"{self.base_url}/recording/{recording_mbid}",
+                    {"fmt": "json", "inc": "artist-credits+releases"}
+                )
+                artist = data["artist-credit"][0]["name"]
+                title = data["title"]
+            except (requests.exceptions.RequestException, KeyError, IndexError, TypeError) as e:
+                print(f"Error getting track info for {recording_mbid}: {e}", file=sys.stderr)
+                return None, None
+            if data["releases"]:
+                release = data["releases"][0]
+                info = [artist, title, release["title"], release.get("date"), release["id"]]
+            else:
+                info = [artist, title, "Unknown Album", None, None]
+            return info, MUSICBRAINZ_CACHE_TTL
+
+        info = await self._coalesced(f"release_info:{recording_mbid}", fetch)
+        return tuple(info) if info else (None, None, None, None, None)
@@ -4,15 +4,20 @@ import os
 import sys
 import shutil
 import asyncio
+import re
 from tqdm import tqdm
-from config import TEMP_DOWNLOAD_FOLDER
+from config import TEMP_DOWNLOAD_FOLDER, NAVIDROME_MAX_CONCURRENT_REQUESTS, CLEANUP_MANIFEST_ONLY
 from mutagen import File, MutagenError
-from mutagen.id3 import ID3, COMM, ID3NoHeaderError, error as ID3Error
-from mutagen.mp3 import MP3
+from mutagen.id3 import ID3, COMM
 from mutagen.flac import FLAC
 from mutagen.oggvorbis import OggVorbis
-from mutagen.m4a import M4A
-from utils import sanitize_filename
+from mutagen.mp4 import MP4
+from mutagen.asf import ASF
+from apis import http_client
+from utils import sanitize_filename, prune_empty_dirs, fix_ownership, PersistentCache
+
+# Fields the cleanup needs from a song; search3 results missing one of these are completed with getSong.view
+REQUIRED_SONG_FIELDS = ('id', 'path', 'artist', 'title')
 
 class NavidromeAPI:
     def __init__(self, root_nd, user_nd, password_nd, music_library_path, target_comment, lastfm_target_comment, album_recommendation_comment=None, llm_target_comment=None, listenbrainz_enabled=False, lastfm_enabled=False, llm_enabled=False):
@@ -27,6 +32,12 @@ class NavidromeAPI:
         self.listenbrainz_enabled = listenbrainz_enabled
         self.lastfm_enabled = lastfm_enabled
         self.llm_enabled = llm_enabled
+        self.tag_cache = PersistentCache("tags")
+        self.manifest = PersistentCache("manifest")
+        # Remembers whether a full scan has backfilled the manifest with files tagged before it existed
+        self.manifest_state = PersistentCache("manifest_state")
+        self._dir_listings = {}
+        self._emptied_dirs = set()
 
     def _get_navidrome_auth_params(self):
         """Generates authentication parameters for Navidrome."""
@@ -34,9 +45,41 @@ class NavidromeAPI:
         token = hashlib.md5((self.password_nd + salt).encode('utf-8')).hexdigest()
         return salt, token
 
-    def _get_all_songs(self, salt, token):
-        """Fetches all songs from Navidrome."""
+    async def _iter_all_songs(self, salt, token, page_size=500):
+        """Pages through every song in Navidrome with search3, yielding one chunk of songs at a time."""
         url = f"{self.root_nd}/rest/search3.view"
+        offset = 0
+        while True:
+            params = {
+                'u': self.user_nd,
+                't': token,
+                's': salt,
+                'v': '1.16.1',
+                'c': 'python-script',
+                'f': 'json',
+                'query': '',
+                'artistCount': 0,
+                'albumCount': 0,
+                'songCount': page_size,
+                'songOffset': offset
+            }
+            response = await http_client.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            if data['subsonic-response']['status'] != 'ok' or 'searchResult3' not in data['subsonic-response']:
+                print(f"Error fetching songs from Navidrome: {data['subsonic-response']['status']}")
+                return
+
+            songs = data['subsonic-response']['searchResult3'].get('song', [])
+            if songs:
+                yield songs
+            if len(songs) < page_size:
+                return
+            offset += len(songs)
+
+    async def _get_song_details(self, song_id, salt, token):
+        """Fetches details of a specific song from Navidrome."""
+        url = f"{self.root_nd}/rest/getSong.view"
         params = {
             'u': self.user_nd,
             't': token,
@@ -44,21 +87,20 @@ class NavidromeAPI:
             'v': '1.16.1',
             'c': 'python-script',
             'f': 'json',
-            'query': '',
-            'songCount': 10000
+            'id': song_id
         }
-        response = requests.get(url, params=params)
+        response = await http_client.get(url, params=params)
         response.raise_for_status()
         data = response.json()
-        if data['subsonic-response']['status'] == 'ok' and 'searchResult3' in data['subsonic-response']:
-            return data['subsonic-response']['searchResult3']['song']
+        if data['subsonic-response']['status'] == 'ok' and 'song' in data['subsonic-response']:
+            return data['subsonic-response']['song']
         else:
-            print(f"Error fetching songs from Navidrome: {data['subsonic-response']['status']}")
-            return []
+            print(f"Error fetching song details from Navidrome: {data.get('subsonic-response', {}).get('status', 'Unknown')}")
+            return None
 
-    def _get_song_details(self, song_id, salt, token):
-        """Fetches details of a specific song from Navidrome."""
-        url = f"{self.root_nd}/rest/getSong.view"
+    async def _search_songs(self, query, salt, token, song_count=20):
+        """Searches Navidrome songs with search3 and returns the matching songs."""
+        url = f"{self.root_nd}/rest/search3.view"
         params = {
             'u': self.user_nd,
             't': token,
@@ -66,16 +108,116 @@ class NavidromeAPI:
             'v': '1.16.1',
             'c': 'python-script',
             'f': 'json',
-            'id': song_id
+            'query': query,
+            'artistCount': 0,
+            'albumCount': 0,
+            'songCount': song_count
         }
-        response = requests.get(url, params=params)
+        response = await http_client.get(url, params=params)
         response.raise_for_status()
         data = response.json()
-        if data['subsonic-response']['status'] == 'ok' and 'song' in data['subsonic-response']:
-            return data['subsonic-response']['song']
-        else:
-            print(f"Error fetching song details from Navidrome: {data.get('subsonic-response', {}).get('status', 'Unknown')}")
+        if data['subsonic-response']['status'] == 'ok' and 'searchResult3' in data['subsonic-response']:
+            return data['subsonic-response']['searchResult3'].get('song', [])
+        print(f"Error searching songs in Navidrome: {data.get('subsonic-response', {}).get('status', 'Unknown')}")
+        return []
+
+    async def _resolve_song_details(self, songs, salt, token, bulk_metadata=True, max_concurrent=NAVIDROME_MAX_CONCURRENT_REQUESTS):
+        """
+        Returns the song details for a chunk of search3 results, in the same order.
+        In bulk-metadata mode the search3 payload is used directly and getSong.view is only called
+        for songs missing a required field. Those calls run concurrently, bounded by max_concurrent.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def fetch(song):
+            if bulk_metadata and all(song.get(field) for field in REQUIRED_SONG_FIELDS):
+                return song
+            async with semaphore:
+                try:
+                    return await self._get_song_details(song['id'], salt, token)
+                except requests.exceptions.RequestException as e:
+                    print(f"Error fetching song details for {song.get('id')} from Navidrome: {e}")
+                    return None
+
+        return await asyncio.gather(*(fetch(song) for song in songs))
+
+    @staticmethod
+    def _first_tag_value(audio, key):
+        """Returns the first non-empty value of a tag as a stripped string, or None."""
+        values = audio.get(key) if audio is not None else None
+        if not values:
             return None
+        if not isinstance(values, list):
+            values = getattr(values, 'text', [values])
+        for value in values:
+            value = str(value).strip()
+            if value:
+                return value
+        return None
+
+    def _parse_tags(self, file_path):
+        """
+        Reads artist, album, title and comment from an audio file with Mutagen.
+        Raises if the file cannot be parsed so callers can apply their own fallback.
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext == '.mp3':
+            audio = ID3(file_path)
+            comment = None
+            for comm_frame in audio.getall('COMM'):
+                texts = comm_frame.text if isinstance(comm_frame.text, list) else [comm_frame.text]
+                comment = next((str(text).strip() for text in texts if text is not None and str(text).strip()), None)
+                if not comment and not comm_frame.text and comm_frame.desc:
+                    # Some taggers store the comment in the description field
+                    comment = str(comm_frame.desc).strip() or None
+                if comment:
+                    break
+            return {
+                'artist': self._first_tag_value(audio, 'TPE1'),
+                'album': self._first_tag_value(audio, 'TALB'),
+                'title': self._first_tag_value(audio, 'TIT2'),
+                'comment': comment,
+            }
+        if file_ext in ('.m4a', '.aac'):
+            audio = MP4(file_path)
+            keys = ('\xa9ART', '\xa9alb', '\xa9nam', '\xa9cmt')
+        elif file_ext == '.flac':
+            audio = FLAC(file_path)
+            keys = ('artist', 'album', 'title', 'comment')
+        elif file_ext in ('.ogg', '.oga'):
+            audio = OggVorbis(file_path)
+            keys = ('artist', 'album', 'title', 'comment')
+        elif file_ext == '.wma':
+            audio = ASF(file_path)
+            keys = ('Author', 'WM/AlbumTitle', 'Title', 'Description')
+        else:
+            audio = File(file_path, easy=True)
+            if audio is None:
+                raise MutagenError(f"Could not open audio file: {file_path}")
+            keys = ('artist', 'album', 'title', 'comment')
+        return dict(zip(('artist', 'album', 'title', 'comment'), (self._first_tag_value(audio, key) for key in keys)))
+
+    def _read_tags(self, file_path):
+        """
+        Returns the parsed tags of a file, reusing the persistent tag cache when the file's size
+        and modification time are unchanged since it was last read.
+        """
+        stat = os.stat(file_path)
+        cached = self.tag_cache.get(file_path)
+        if cached and cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns:
+            return cached['tags']
+
+        tags = self._parse_tags(file_path)
+        self._cache_tags(file_path, tags, stat)
+        return tags
+
+    def _cache_tags(self, file_path, tags, stat=None):
+        """Stores parsed tags for a file together with the size and mtime they were read at."""
+        try:
+            stat = stat or os.stat(file_path)
+        except OSError:
+            return
+        self.tag_cache.set(file_path, {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'tags': tags})
 
     def _update_song_comment(self, file_path, new_comment):
         """Updates the comment of a song using Mutagen."""
@@ -102,6 +244,14 @@ class NavidromeAPI:
                 return
             
             audio.save()
+            entry = self.manifest.get(file_path)
+            if entry is not None:
+                if new_comment in self._recommendation_comments():
+                    entry['comment'] = new_comment
+                    self.manifest.set(file_path, entry)
+                else:
+                    # No longer a recommendation (kept or reviewed), so manifest cleanups can forget it
+                    self.manifest.delete(file_path)
             print(f"Successfully updated comment for {file_path} with Mutagen.")
 
         except MutagenError as e:
@@ -115,6 +265,10 @@ class NavidromeAPI:
             if os.path.isfile(song_path):
                 try:
                     os.remove(song_path)
+                    self.tag_cache.delete(song_path)
+                    self._forget_library_path(song_path)
+                    self.manifest.delete(song_path)
+                    self._emptied_dirs.add(os.path.dirname(song_path))
                     print(f"Successfully deleted file: {song_path}")
                     return True
                 except OSError as e:
@@ -163,316 +317,290 @@ class NavidromeAPI:
         # Third strat : more complex logic function if needed
         return self._find_actual_song_path_fallback(navidrome_relative_path)
 
-    def _find_actual_song_path_fallback(self, navidrome_relative_path):
+    def _list_library_dir(self, dir_path):
         """
-        Fallback method using the original complex path resolution logic.
-        Only used when the cleaner approach fails.
+        Lists one library directory, mapping lowercase entry names to the actual names on disk.
+        Listings are cached for the run, so each artist/album directory is read at most once.
         """
-        # Common variations
-        modified_relative_path_1 = navidrome_relative_path.replace(" - ", " ")
-        full_path_1 = os.path.join(self.music_library_path, modified_relative_path_1)
-        if os.path.exists(full_path_1):
-            return full_path_1
+        dir_path = os.path.normpath(dir_path)
+        listing = self._dir_listings.get(dir_path)
+        if listing is None:
+            listing = {}
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        listing.setdefault(entry.name.lower(), []).append(entry.name)
+            except OSError:
+                pass
+            self._dir_listings[dir_path] = listing
+        return listing
 
-        modified_relative_path_2 = navidrome_relative_path.replace(" ", " - ")
-        full_path_2 = os.path.join(self.music_library_path, modified_relative_path_2)
-        if os.path.exists(full_path_2):
-            return full_path_2
+    def _lookup_library_path(self, relative_path):
+        """
+        Resolves a relative path case-insensitively one component at a time, preferring exact-case matches.
+        Only the directories along the path are listed, never the whole library.
+        """
+        parts = [part for part in os.path.normpath(relative_path).split(os.sep) if part not in ('', '.')]
+        if not parts or '..' in parts:
+            return None
 
-        # Removing track number prefix
-        import re
+        def resolve(dir_path, remaining):
+            names = self._list_library_dir(dir_path).get(remaining[0].lower(), [])
+            # Try the exact-case name first, then the other case variants
+            for name in sorted(names, key=lambda name: name != remaining[0]):
+                full_path = os.path.join(dir_path, name)
+                if len(remaining) == 1:
+                    if os.path.isfile(full_path):
+                        return full_path
+                elif os.path.isdir(full_path):
+                    found = resolve(full_path, remaining[1:])
+                    if found:
+                        return found
+            return None
+
+        return resolve(self.music_library_path, parts)
+
+    def _forget_library_path(self, song_path):
+        """Drops a deleted file from the cached directory listings so later lookups don't resolve to it."""
+        listing = self._dir_listings.get(os.path.normpath(os.path.dirname(song_path)))
+        if not listing:
+            return
+        name = os.path.basename(song_path)
+        names = listing.get(name.lower())
+        if names and name in names:
+            names.remove(name)
+            if not names:
+                del listing[name.lower()]
+
+    def _find_actual_song_path_fallback(self, navidrome_relative_path):
+        """
+        Fallback method using the original complex path resolution logic.
+        Only used when the cleaner approach fails. Every variation is resolved against cached
+        listings of the artist/album directories involved, which also covers case differences.
+        """
         track_number_pattern = r'^\d{1,2}\s*-\s*(.+)$'
-        match = re.match(track_number_pattern, os.path.basename(navidrome_relative_path))
-        if match:
-            filename_without_number = match.group(1)
-            path_without_number = os.path.join(os.path.dirname(navidrome_relative_path), filename_without_number)
-            full_path_3 = os.path.join(self.music_library_path, path_without_number)
-            if os.path.exists(full_path_3):
-                return full_path_3
-
-        # Different separators in path
         path_parts = navidrome_relative_path.split('/')
-        if len(path_parts) >= 2:
-            # Just artist/album/filename (w/o track number)
-            filename = os.path.basename(navidrome_relative_path)
-            match = re.match(track_number_pattern, filename)
-            if match:
-                clean_filename = match.group(1)
-                clean_path = os.path.join(path_parts[0], path_parts[1], clean_filename)
-                full_path_4 = os.path.join(self.music_library_path, clean_path)
-                if os.path.exists(full_path_4):
-                    return full_path_4
-
-        # Additional case variations
-        if len(path_parts) >= 2:
-            # Case-insensitive artist name matching
-            artist_lower = path_parts[0].lower()
-            album_lower = path_parts[1].lower()
+        filename = os.path.basename(navidrome_relative_path)
+        match = re.match(track_number_pattern, filename)
+        clean_filename = match.group(1) if match else None
 
-            # Directories that match case-insensitively
-            try:
-                for root_dir in os.listdir(self.music_library_path):
-                    if root_dir.lower() == artist_lower:
-                        artist_actual = root_dir
-
-                        # Now album directory
-                        artist_path = os.path.join(self.music_library_path, artist_actual)
-                        if os.path.isdir(artist_path):
-                            for album_dir in os.listdir(artist_path):
-                                if album_dir.lower() == album_lower:
-                                    album_actual = album_dir
-
-                                    album_path = os.path.join(artist_path, album_actual)
-
-                                    # W/ & w/o track number
-                                    filename = os.path.basename(navidrome_relative_path)
-                                    match = re.match(track_number_pattern, filename)
-                                    if match:
-                                        clean_filename = match.group(1)
-                                        file_without_number = os.path.join(album_path, clean_filename)
-                                        if os.path.exists(file_without_number):
-                                            return file_without_number
-
-                                    # Original filename
-                                    file_with_path = os.path.join(album_path, filename)
-                                    if os.path.exists(file_with_path):
-                                        return file_with_path
-            except OSError:
-                pass
+        # Common variations
+        candidates = [
+            navidrome_relative_path,
+            navidrome_relative_path.replace(" - ", " "),
+            navidrome_relative_path.replace(" ", " - "),
+        ]
+
+        # Removing track number prefix
+        if clean_filename:
+            candidates.append(os.path.join(os.path.dirname(navidrome_relative_path), clean_filename))
 
-        # Handling underscore variations in artist names
         if len(path_parts) >= 2:
-            artist_part = path_parts[0]
-            
-            # Removing everything after underscore
-            if '_' in artist_part:
-                base_artist = artist_part.split('_')[0]
+            # Just artist/album/filename (w/ & w/o track number)
+            if clean_filename:
+                candidates.append(os.path.join(path_parts[0], path_parts[1], clean_filename))
+            candidates.append(os.path.join(path_parts[0], path_parts[1], filename))
+
+            # Handling underscore variations in artist names: removing everything after underscore
+            if '_' in path_parts[0]:
+                base_artist = path_parts[0].split('_')[0]
                 modified_path = os.path.join(base_artist, *path_parts[1:])
-                full_path = os.path.join(self.music_library_path, modified_path)
-                if os.path.exists(full_path):
-                    return full_path
-                
-                # Modified path + track number removal
-                filename = os.path.basename(modified_path)
-                match = re.match(track_number_pattern, filename)
-                if match:
-                    clean_filename = match.group(1)
-                    path_without_number = os.path.join(os.path.dirname(modified_path), clean_filename)
-                    full_path_without_number = os.path.join(self.music_library_path, path_without_number)
-                    if os.path.exists(full_path_without_number):
-                        return full_path_without_number
+                candidates.append(modified_path)
+                if clean_filename:
+                    candidates.append(os.path.join(os.path.dirname(modified_path), clean_filename))
+
+        for candidate in candidates:
+            full_path = self._lookup_library_path(candidate)
+            if full_path:
+                return full_path
 
         return None
 
-    async def process_navidrome_library(self, listenbrainz_api=None, lastfm_api=None):
-        """Processes the Navidrome library with a progress bar."""
+    async def process_navidrome_library(self, listenbrainz_api=None, lastfm_api=None, bulk_metadata=True, manifest_only=CLEANUP_MANIFEST_ONLY):
+        """
+        Processes the Navidrome library with a progress bar.
+        With bulk_metadata, song fields come straight from the search3 listing instead of one getSong.view call per song.
+        With manifest_only, only the recommendation files in the download manifest are visited; the first
+        such run scans the whole library once to add files tagged before the manifest existed.
+        """
         salt, token = self._get_navidrome_auth_params()
-        all_songs = self._get_all_songs(salt, token)
-        print(f"Parsing {len(all_songs)} songs from Navidrome to cleanup badly rated songs.")
+        self._dir_listings = {}  # Filled lazily by the path fallbacks of this run
+        self._emptied_dirs = set()
+
+        if manifest_only:
+            if self.manifest_state.get('backfilled'):
+                await self._process_manifest(listenbrainz_api, lastfm_api, salt, token)
+                return
+            print("First manifest-only cleanup: scanning the whole library once to add older recommendation files to the manifest.")
+
+        print("Streaming songs from Navidrome to cleanup badly rated songs.")
         print(f"Looking for comments: '{self.target_comment}' (ListenBrainz), '{self.lastfm_target_comment}' (Last.fm), '{self.album_recommendation_comment}' (Album Recommendation), and '{self.llm_target_comment}' (LLM)")
 
         deleted_songs = []
-        found_comments = []
+        total_songs = 0
+
+        with tqdm(desc="Processing Navidrome Library", unit="song", file=sys.stdout) as progress_bar:
+            async for songs in self._iter_all_songs(salt, token):
+                songs_details = await self._resolve_song_details(songs, salt, token, bulk_metadata=bulk_metadata)
+                for song_details in songs_details:
+                    if song_details is not None:
+                        await self._process_library_song(song_details, deleted_songs, listenbrainz_api, lastfm_api)
+                    progress_bar.update(1)
+                total_songs += len(songs)
+
+        print(f"Parsed {total_songs} songs from Navidrome.")
+        self._finish_cleanup(deleted_songs)
+        # Every recommendation file in the library is in the manifest now
+        self.manifest_state.set('backfilled', True)
+
+    def _recommendation_comments(self):
+        """Maps each configured recommendation comment to the source it tags."""
+        comments = {
+            self.target_comment: 'listenbrainz',
+            self.lastfm_target_comment: 'lastfm',
+            self.album_recommendation_comment: 'album',
+            self.llm_target_comment: 'llm',
+        }
+        return {comment: source for comment, source in comments.items() if comment}
+
+    def _record_manifest_entry(self, file_path, comment, navidrome_id=None):
+        """
+        Records a recommendation file placed in the library, with the source its comment tag belongs to.
+        Other files are left out, so the manifest only grows with pending recommendations.
+        """
+        source = self._recommendation_comments().get(comment)
+        if source is None:
+            self.manifest.delete(file_path)
+            return
+        self.manifest.set(file_path, {
+            'path': file_path,
+            'source': source,
+            'comment': comment,
+            'navidrome_id': navidrome_id,
+        })
+
+    async def _find_manifest_song(self, entry, salt, token):
+        """
+        Returns the Navidrome song for a manifest entry, by ID when known, otherwise by searching
+        its title and matching the resolved path. Newly found IDs are stored in the manifest.
+        """
+        if entry.get('navidrome_id'):
+            song = await self._get_song_details(entry['navidrome_id'], salt, token)
+            if song:
+                return song
 
-        for song in tqdm(all_songs, desc="Processing Navidrome Library", unit="song", file=sys.stdout):
-            song_details = self._get_song_details(song['id'], salt, token)
-            if song_details is None:
-                continue
+        try:
+            title = self._read_tags(entry['path']).get('title')
+        except Exception:
+            title = None
+        query = title or os.path.splitext(os.path.basename(entry['path']))[0]
+        for song in await self._search_songs(query, salt, token):
+            if song.get('path') and self._find_actual_song_path(song['path'], song) == entry['path']:
+                entry['navidrome_id'] = song['id']
+                self.manifest.set(entry['path'], entry)
+                return song
+        return None
 
-            navidrome_relative_path = song_details['path']
-            song_path = self._find_actual_song_path(navidrome_relative_path, song_details)
+    async def _process_manifest(self, listenbrainz_api, lastfm_api, salt, token):
+        """
+        Applies the cleanup rules to the recommendation files listed in the download manifest.
+        """
+        recommendation_comments = self._recommendation_comments()
+        entries = [entry for _, entry in self.manifest.items() if entry.get('comment') in recommendation_comments]
+        if not entries:
+            print("No recommendation files in the download manifest, nothing to clean up.")
+            return
 
-            if song_path is None:
-                continue
+        print(f"Processing {len(entries)} recommendation files from the download manifest.")
+        deleted_songs = []
+        semaphore = asyncio.Semaphore(NAVIDROME_MAX_CONCURRENT_REQUESTS)
+
+        async def fetch(entry):
+            if not os.path.exists(entry['path']):
+                print(f"Manifest file no longer exists, dropping it: {entry['path']}")
+                self.manifest.delete(entry['path'])
+                return None
+            async with semaphore:
+                try:
+                    return await self._find_manifest_song(entry, salt, token)
+                except requests.exceptions.RequestException as e:
+                    print(f"Error looking up {entry['path']} in Navidrome: {e}")
+                    return None
+
+        songs_details = await asyncio.gather(*(fetch(entry) for entry in entries))
+        with tqdm(total=len(entries), desc="Processing Download Manifest", unit="song", file=sys.stdout) as progress_bar:
+            for entry, song_details in zip(entries, songs_details):
+                if song_details is None:
+                    if os.path.exists(entry['path']):
+                        print(f"Not yet indexed by Navidrome, skipping: {entry['path']}")
+                else:
+                    await self._process_library_song(song_details, deleted_songs, listenbrainz_api, lastfm_api)
+                progress_bar.update(1)
+
+        self._finish_cleanup(deleted_songs)
+
+    def _finish_cleanup(self, deleted_songs):
+        """Reports the deleted songs and removes the folders they left empty."""
+        if deleted_songs:
+            print("Deleting the following songs from last week recommendation playlist:")
+            for song in deleted_songs:
+                print(f"- {song}")
+        else:
+            print("No songs with recommendation comment were found.")
 
-            # Check if song has a recommendation comment - first from Navidrome API
-            api_comment = song_details.get('comment', '')
+        # Remove folders left empty by the deleted songs
+        print("Removing empty folders from music library...")
+        prune_empty_dirs(self._emptied_dirs, self.music_library_path)
+        self._emptied_dirs = set()
+        print("Empty folder removal completed.")
 
-            # Check tags for target comment using mutagen
-            actual_comment = ""
-            try:
-                # Use File() to open various audio formats
-                audio = File(song_path)
-                if audio is None:
-                    raise MutagenError("Could not open audio file.")
-
-                if song_path.lower().endswith('.mp3'):
-                    # For MP3s, use ID3 tags
-                    if audio.tags is None:
-                        raise ID3Error("No ID3 tags found.")
-                    
-                    comm_frames = audio.tags.getall('COMM')
-
-                    for comm_frame in comm_frames:
-                        # Try to get text from the frame
-                        if comm_frame.text:
-                            # Handle both string and list formats
-                            if isinstance(comm_frame.text, list):
-                                text_value = comm_frame.text[0] if comm_frame.text else None
-                            else:
-                                text_value = comm_frame.text
-
-                            # Convert to string and strip whitespace
-                            if text_value is not None:
-                                text_value_str = str(text_value).strip()
-                                if text_value_str:
-                                    actual_comment = text_value_str
-                                    break
-
-                        # Also try accessing via description if no direct text
-                        elif hasattr(comm_frame, 'desc') and comm_frame.desc:
-                            desc_value = str(comm_frame.desc).strip()
-                            if desc_value:
-                                actual_comment = desc_value
-                                break
-
-                    # Direct access to specific COMM frames if no comment found
-                    if not actual_comment:
-                        for key in audio.keys():
-                            if key.startswith('COMM'):
-                                frame = audio[key]
-                                if hasattr(frame, 'text') and frame.text:
-                                    if isinstance(frame.text, list):
-                                        text_value = frame.text[0] if frame.text else None
-                                    else:
-                                        text_value = frame.text
-
-                                    if text_value is not None:
-                                        text_value_str = str(text_value).strip()
-                                        if text_value_str:
-                                            actual_comment = text_value_str
-                                            break
-                                # Check description field for language-specific frames
-                                elif hasattr(frame, 'desc') and frame.desc:
-                                    desc_value = str(frame.desc).strip()
-                                    if desc_value:
-                                        actual_comment = desc_value
-                                        break
-
-            except (ImportError, ID3NoHeaderError, Exception) as e:
-                # If mutagen fails or no ID3 tags, fall back to API comment
-                actual_comment = api_comment
+    async def _process_library_song(self, song_details, deleted_songs, listenbrainz_api=None, lastfm_api=None):
+        """Applies the rating-based cleanup rules to a single Navidrome song."""
+        navidrome_relative_path = song_details['path']
+        song_path = self._find_actual_song_path(navidrome_relative_path, song_details)
 
-            
-            # Use the actual file comment if available, otherwise use API comment
-            song_comment = actual_comment if actual_comment else api_comment
-            has_recommendation_comment = (song_comment == self.target_comment or
-                                        song_comment == self.lastfm_target_comment or
-                                        song_comment == self.album_recommendation_comment or
-                                        song_comment == self.llm_target_comment)
-            
+        if song_path is None:
+            return
+
+        # Check if song has a recommendation comment - first from Navidrome API
+        api_comment = song_details.get('comment', '')
 
+        # Check tags for target comment using mutagen (served from the tag cache when the file is unchanged)
+        try:
+            actual_comment = self._read_tags(song_path).get('comment') or ""
+        except Exception:
+            # If mutagen fails or no tags, fall back to API comment
+            actual_comment = api_comment
+
+        # Use the actual file comment if available, otherwise use API comment
+        song_comment = actual_comment if actual_comment else api_comment
+        has_recommendation_comment = (song_comment == self.target_comment or
+                                    song_comment == self.lastfm_target_comment or
+                                    song_comment == self.album_recommendation_comment or
+                                    song_comment == self.llm_target_comment)
+
+        # Keep the manifest in step with the library: add recommendation files tagged before it existed
+        # and remember Navidrome IDs so manifest mode can skip the search
+        entry = self.manifest.get(song_path)
+        if has_recommendation_comment and (entry is None or entry.get('navidrome_id') != song_details.get('id')):
+            self._record_manifest_entry(song_path, song_comment, song_details.get('id'))
+        elif entry is not None and not has_recommendation_comment:
+            self.manifest.delete(song_path)
+
+        if has_recommendation_comment and song_path:
+            user_rating = song_details.get('userRating', 0)
             
-            if has_recommendation_comment and song_path:
-                user_rating = song_details.get('userRating', 0)
-                
-                # ListenBrainz recommendations
-                if song_comment == self.target_comment and self.listenbrainz_enabled:
-                    if user_rating == 5:
-                        self._update_song_comment(song_path, "")
-                        # Submit positive feedback (love) for 5-star tracks
-                        if 'musicBrainzId' in song_details and song_details['musicBrainzId'] and listenbrainz_api:
-                            await listenbrainz_api.submit_feedback(song_details['musicBrainzId'], 1)
-                    elif user_rating == 4:
-                        # Keep 4-star tracks but remove comment (no feedback)
-                        self._update_song_comment(song_path, "")
-                    elif user_rating == 1:
-                        if os.path.isdir(song_path):
-                            all_files_deleted_in_dir = True
-                            for root, _, files in os.walk(song_path):
-                                for file in files:
-                                    file_to_delete = os.path.join(root, file)
-                                    if not self._delete_song(file_to_delete):
-                                        all_files_deleted_in_dir = False
-                            if all_files_deleted_in_dir:
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-                        else:
-                            if self._delete_song(song_path):
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-                        # Submit negative feedback (hate) for 1-star tracks
-                        if 'musicBrainzId' in song_details and song_details['musicBrainzId'] and listenbrainz_api:
-                            await listenbrainz_api.submit_feedback(song_details['musicBrainzId'], -1)
-                    elif user_rating <= 3:
-                        # Delete tracks rated 2-3 stars but don't submit feedback
-                        if os.path.isdir(song_path):
-                            all_files_deleted_in_dir = True
-                            for root, _, files in os.walk(song_path):
-                                for file in files:
-                                    file_to_delete = os.path.join(root, file)
-                                    if not self._delete_song(file_to_delete):
-                                        all_files_deleted_in_dir = False
-                            if all_files_deleted_in_dir:
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-                        else:
-                            if self._delete_song(song_path):
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-
-                # Last.fm recommendations
-                elif song_comment == self.lastfm_target_comment and self.lastfm_enabled:
-                    if user_rating == 5:
-                        self._update_song_comment(song_path, "")
-                        # Submit positive feedback (love) for 5-star tracks
-                        if lastfm_api:
-                            try:
-                                await asyncio.to_thread(lastfm_api.love_track, song_details['title'], song_details['artist'])
-                            except Exception as e:
-                                print(f"Error submitting Last.fm love feedback for {song_details['artist']} - {song_details['title']}: {e}")
-                    elif user_rating == 4:
-                        # Keep 4-star tracks but remove comment (no feedback)
-                        self._update_song_comment(song_path, "")
-                    elif user_rating <= 3:
-                        if os.path.isdir(song_path):
-                            all_files_deleted_in_dir = True
-                            for root, _, files in os.walk(song_path):
-                                for file in files:
-                                    file_to_delete = os.path.join(root, file)
-                                    if not self._delete_song(file_to_delete):
-                                        all_files_deleted_in_dir = False
-                            if all_files_deleted_in_dir:
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-                        else:
-                            if self._delete_song(song_path):
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-
-                # Album recommendations
-                elif song_comment == self.album_recommendation_comment:
-                    if user_rating == 5 or user_rating == 4:
-                        # Keep 4-5 star tracks but remove comment (no feedback for albums)
-                        self._update_song_comment(song_path, "")
-                    elif user_rating <= 3:
-                        if os.path.isdir(song_path):
-                            all_files_deleted_in_dir = True
-                            for root, _, files in os.walk(song_path):
-                                for file in files:
-                                    file_to_delete = os.path.join(root, file)
-                                    if not self._delete_song(file_to_delete):
-                                        all_files_deleted_in_dir = False
-                            if all_files_deleted_in_dir:
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-                        else:
-                            if self._delete_song(song_path):
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-
-                # LLM recommendations
-                elif song_comment == self.llm_target_comment and self.llm_enabled:
-                    if user_rating >= 4: # Keep 4-5 star tracks
-                        self._update_song_comment(song_path, "")
-                    elif user_rating <= 3: # Delete tracks rated 3 stars or below
-                        if os.path.isdir(song_path):
-                            all_files_deleted_in_dir = True
-                            for root, _, files in os.walk(song_path):
-                                for file in files:
-                                    file_to_delete = os.path.join(root, file)
-                                    if not self._delete_song(file_to_delete):
-                                        all_files_deleted_in_dir = False
-                            if all_files_deleted_in_dir:
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-                        else:
-                            if self._delete_song(song_path):
-                                deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
-
-                # When no specific service is enabled, delete all commented songs
-                elif not self.listenbrainz_enabled and not self.lastfm_enabled:
+            # ListenBrainz recommendations
+            if song_comment == self.target_comment and self.listenbrainz_enabled:
+                if user_rating == 5:
+                    self._update_song_comment(song_path, "")
+                    # Submit positive feedback (love) for 5-star tracks
+                    if 'musicBrainzId' in song_details and song_details['musicBrainzId'] and listenbrainz_api:
+                        await listenbrainz_api.submit_feedback(song_details['musicBrainzId'], 1)
+                elif user_rating == 4:
+                    # Keep 4-star tracks but remove comment (no feedback)
+                    self._update_song_comment(song_path, "")
+                elif user_rating == 1:
                     if os.path.isdir(song_path):
                         all_files_deleted_in_dir = True
                         for root, _, files in os.walk(song_path):
@@ -481,23 +609,106 @@ class NavidromeAPI:
                                 if not self._delete_song(file_to_delete):
                                     all_files_deleted_in_dir = False
                         if all_files_deleted_in_dir:
-                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']} (Commented)")
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
                     else:
                         if self._delete_song(song_path):
-                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']} (Commented)")
-
-        if deleted_songs:
-            print("Deleting the following songs from last week recommendation playlist:")
-            for song in deleted_songs:
-                print(f"- {song}")
-        else:
-            print("No songs with recommendation comment were found.")
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
+                    # Submit negative feedback (hate) for 1-star tracks
+                    if 'musicBrainzId' in song_details and song_details['musicBrainzId'] and listenbrainz_api:
+                        await listenbrainz_api.submit_feedback(song_details['musicBrainzId'], -1)
+                elif user_rating <= 3:
+                    # Delete tracks rated 2-3 stars but don't submit feedback
+                    if os.path.isdir(song_path):
+                        all_files_deleted_in_dir = True
+                        for root, _, files in os.walk(song_path):
+                            for file in files:
+                                file_to_delete = os.path.join(root, file)
+                                if not self._delete_song(file_to_delete):
+                                    all_files_deleted_in_dir = False
+                        if all_files_deleted_in_dir:
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
+                    else:
+                        if self._delete_song(song_path):
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
+
+            # Last.fm recommendations
+            elif song_comment == self.lastfm_target_comment and self.lastfm_enabled:
+                if user_rating == 5:
+                    self._update_song_comment(song_path, "")
+                    # Submit positive feedback (love) for 5-star tracks
+                    if lastfm_api:
+                        try:
+                            await asyncio.to_thread(lastfm_api.love_track, song_details['title'], song_details['artist'])
+                        except Exception as e:
+                            print(f"Error submitting Last.fm love feedback for {song_details['artist']} - {song_details['title']}: {e}")
+                elif user_rating == 4:
+                    # Keep 4-star tracks but remove comment (no feedback)
+                    self._update_song_comment(song_path, "")
+                elif user_rating <= 3:
+                    if os.path.isdir(song_path):
+                        all_files_deleted_in_dir = True
+                        for root, _, files in os.walk(song_path):
+                            for file in files:
+                                file_to_delete = os.path.join(root, file)
+                                if not self._delete_song(file_to_delete):
+                                    all_files_deleted_in_dir = False
+                        if all_files_deleted_in_dir:
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
+                    else:
+                        if self._delete_song(song_path):
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
+
+            # Album recommendations
+            elif song_comment == self.album_recommendation_comment:
+                if user_rating == 5 or user_rating == 4:
+                    # Keep 4-5 star tracks but remove comment (no feedback for albums)
+                    self._update_song_comment(song_path, "")
+                elif user_rating <= 3:
+                    if os.path.isdir(song_path):
+                        all_files_deleted_in_dir = True
+                        for root, _, files in os.walk(song_path):
+                            for file in files:
+                                file_to_delete = os.path.join(root, file)
+                                if not self._delete_song(file_to_delete):
+                                    all_files_deleted_in_dir = False
+                        if all_files_deleted_in_dir:
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
+                    else:
+                        if self._delete_song(song_path):
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
 
-        # Remove empty folders after cleanup
-        print("Removing empty folders from music library...")
-        from utils import remove_empty_folders
-        remove_empty_folders(self.music_library_path)
-        print("Empty folder removal completed.")
+            # LLM recommendations
+            elif song_comment == self.llm_target_comment and self.llm_enabled:
+                if user_rating >= 4: # Keep 4-5 star tracks
+                    self._update_song_comment(song_path, "")
+                elif user_rating <= 3: # Delete tracks rated 3 stars or below
+                    if os.path.isdir(song_path):
+                        all_files_deleted_in_dir = True
+                        for root, _, files in os.walk(song_path):
+                            for file in files:
+                                file_to_delete = os.path.join(root, file)
+                                if not self._delete_song(file_to_delete):
+                                    all_files_deleted_in_dir = False
+                        if all_files_deleted_in_dir:
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
+                    else:
+                        if self._delete_song(song_path):
+                            deleted_songs.append(f"{song_details['artist']} - {song_details['title']}")
+
+            # When no specific service is enabled, delete all commented songs
+            elif not self.listenbrainz_enabled and not self.lastfm_enabled:
+                if os.path.isdir(song_path):
+                    all_files_deleted_in_dir = True
+                    for root, _, files in os.walk(song_path):
+                        for file in files:
+                            file_to_delete = os.path.join(root, file)
+                            if not self._delete_song(file_to_delete):
+                                all_files_deleted_in_dir = False
+                    if all_files_deleted_in_dir:
+                        deleted_songs.append(f"{song_details['artist']} - {song_details['title']} (Commented)")
+                else:
+                    if self._delete_song(song_path):
+                        deleted_songs.append(f"{song_details['artist']} - {song_details['title']} (Commented)")
 
 
     def organize_music_files(self, source_folder, destination_base_folder):
@@ -505,87 +716,29 @@ class NavidromeAPI:
         Organizes music files from a source folder into a destination base folder
         using Artist/Album/filename structure based on metadata.
         """
-        from mutagen.id3 import ID3, ID3NoHeaderError
-        from mutagen.flac import FLAC
-        from mutagen.mp3 import MP3
-        from mutagen.oggvorbis import OggVorbis
-        from mutagen.m4a import M4A
-        from utils import sanitize_filename
-
         print(f"\nOrganizing music files from '{source_folder}' to '{destination_base_folder}'...")
 
         # Supported audio file extensions
         audio_extensions = ('.mp3', '.flac', '.m4a', '.aac', '.ogg', '.wma')
 
+        # Source directories files were moved out of, pruned once organizing is done
+        source_dirs = set()
+        # Files placed in the library, whose ownership is fixed once organizing is done
+        organized_files = []
+
         for root, dirs, files in os.walk(source_folder):
             for filename in files:
                 if filename.lower().endswith(audio_extensions):
                     file_path = os.path.join(root, filename)
+                    source_dirs.add(root)
                     file_ext = os.path.splitext(filename)[1].lower()
 
                     try:
-                        # Extract metadata based on file type
-                        if file_ext == '.mp3':
-                            audio = ID3(file_path)
-                            artist = str(audio.get('TPE1', ['Unknown Artist'])[0])
-                            album = str(audio.get('TALB', ['Unknown Album'])[0])
-                            title = str(audio.get('TIT2', [os.path.splitext(filename)[0]])[0])
-                        elif file_ext == '.flac':
-                            audio = FLAC(file_path)
-                            artist_tag = audio.get('artist')
-                            if artist_tag:
-                                artist = artist_tag[0] if isinstance(artist_tag, list) else str(artist_tag)
-                            else:
-                                artist = 'Unknown Artist'
-                            album_tag = audio.get('album')
-                            if album_tag:
-                                album = album_tag[0] if isinstance(album_tag, list) else str(album_tag)
-                            else:
-                                album = 'Unknown Album'
-                            title_tag = audio.get('title')
-                            if title_tag:
-                                title = title_tag[0] if isinstance(title_tag, list) else str(title_tag)
-                            else:
-                                title = os.path.splitext(filename)[0]
-                        elif file_ext in ('.m4a', '.aac'):
-                            audio = M4A(file_path)
-                            artist_tag = audio.get('\xa9ART')
-                            if artist_tag:
-                                artist = artist_tag[0] if isinstance(artist_tag, list) else str(artist_tag)
-                            else:
-                                artist = 'Unknown Artist'
-                            album_tag = audio.get('\xa9alb')
-                            if album_tag:
-                                album = album_tag[0] if isinstance(album_tag, list) else str(album_tag)
-                            else:
-                                album = 'Unknown Album'
-                            title_tag = audio.get('\xa9nam')
-                            if title_tag:
-                                title = title_tag[0] if isinstance(title_tag, list) else str(title_tag)
-                            else:
-                                title = os.path.splitext(filename)[0]
-                        elif file_ext in ('.ogg', '.wma'):
-                            audio = OggVorbis(file_path)
-                            artist_tag = audio.get('artist')
-                            if artist_tag:
-                                artist = artist_tag[0] if isinstance(artist_tag, list) else str(artist_tag)
-                            else:
-                                artist = 'Unknown Artist'
-                            album_tag = audio.get('album')
-                            if album_tag:
-                                album = album_tag[0] if isinstance(album_tag, list) else str(album_tag)
-                            else:
-                                album = 'Unknown Album'
-                            title_tag = audio.get('title')
-                            if title_tag:
-                                title = title_tag[0] if isinstance(title_tag, list) else str(title_tag)
-                            else:
-                                title = os.path.splitext(filename)[0]
-                        else:
-                            # Fallback for unsupported formats
-                            artist = "Unknown Artist"
-                            album = "Unknown Album"
-                            title = os.path.splitext(filename)[0]
+                        # Extract metadata based on file type (cached by path, size and mtime)
+                        tags = self._read_tags(file_path)
+                        artist = tags.get('artist') or 'Unknown Artist'
+                        album = tags.get('album') or 'Unknown Album'
+                        title = tags.get('title') or os.path.splitext(filename)[0]
 
                         artist = sanitize_filename(artist)
                         album = sanitize_filename(album)
@@ -605,26 +758,20 @@ class NavidromeAPI:
 
                         os.makedirs(album_folder, exist_ok=True)
                         shutil.move(file_path, new_file_path)
+                        # Carry the tags over to the new path so the next cleanup doesn't re-read the file
+                        self.tag_cache.delete(file_path)
+                        self._cache_tags(new_file_path, tags)
+                        self._record_manifest_entry(new_file_path, tags.get('comment'))
+                        organized_files.append(new_file_path)
                         print(f"Moved '{filename}' to '{os.path.relpath(new_file_path, destination_base_folder)}'")
                     except Exception as e:
                         print(f"Error organizing '{filename}': {e}")
                         unorganized_folder = os.path.join(destination_base_folder, "Unorganized")
                         os.makedirs(unorganized_folder, exist_ok=True)
                         shutil.move(file_path, os.path.join(unorganized_folder, filename))
+                        organized_files.append(os.path.join(unorganized_folder, filename))
                         print(f"Moved '{filename}' to 'Unorganized' due to error: {e}")
 
-        # Clean up empty directories and __artwork subfolder
-        def remove_empty_dirs(path):
-            """Recursively remove empty directories."""
-            for root, dirs, files in os.walk(path, topdown=False):
-                for dir_name in dirs:
-                    dir_path = os.path.join(root, dir_name)
-                    try:
-                        os.rmdir(dir_path)
-                        print(f"Removed empty directory: {dir_path}")
-                    except OSError:
-                        pass
-
         # Remove __artwork folder
         artwork_folder = os.path.join(source_folder, "__artwork")
         if os.path.exists(artwork_folder) and os.path.isdir(artwork_folder):
@@ -634,8 +781,8 @@ class NavidromeAPI:
             except Exception as e:
                 print(f"Warning: Could not remove __artwork folder {artwork_folder}: {e}")
 
-        # Remove empty directories in source folder
-        remove_empty_dirs(source_folder)
+        # Remove the source directories emptied by the moves
+        prune_empty_dirs(source_dirs, source_folder)
 
-        # Fix permissions on organized files
-        os.system(f'chown -R 1000:1000 "{destination_base_folder}"')
+        # Fix permissions on the organized files and the folders created for them
+        fix_ownership(organized_files, root=destination_base_folder)
@@ -0,0 +1,169 @@
+import asyncio
+import collections
+import random
+import threading
+import time
+
+class RateLimiter:
+    """
+    Process-wide limiter for an external API: caps concurrent requests and spreads requests
+    over time with a token bucket (max_requests per period seconds). When the server reports
+    overload, record_throttle() pauses every request through the limiter, circuit-breaker style.
+
+    It is shared across threads and event loops on purpose. The web UI runs each async view
+    on its own event loop, so loop-bound primitives (asyncio.Semaphore, aiolimiter) can't be
+    shared between requests. Waiters are woken on their own loop with call_soon_threadsafe.
+    """
+
+    def __init__(self, name, max_concurrent, max_requests, period, backoff_base=1.0, backoff_max=60.0):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_requests = max(1, int(max_requests))
+        self.period = float(period)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters = collections.deque()
+        self._tokens = float(self.max_requests)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._throttle_strikes = 0
+        self._total_throttles = 0
+
+        self._total_requests = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    async def acquire(self):
+        """Waits for a concurrency slot and a token. Cancelling the wait gives the slot back."""
+        started = time.monotonic()
+        await self._acquire_slot()
+        try:
+            await self._take_token()
+        except BaseException:
+            self.release()
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._total_requests += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._last_wait = waited
+
+    def release(self):
+        """Hands the slot to the next waiter, or frees it if nobody is waiting."""
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:
+                    # The waiter's event loop is closed, try the next one
+                    continue
+            self._active -= 1
+
+    @staticmethod
+    def _grant(future):
+        if not future.done():
+            future.set_result(None)
+
+    async def _acquire_slot(self):
+        with self._lock:
+            if self._active < self.max_concurrent and not self._waiters:
+                self._active += 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, future))
+                    granted = False
+                except ValueError:
+                    # release() already handed us the slot, pass it on
+                    granted = True
+            if granted:
+                self.release()
+            raise
+
+    async def _take_token(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    refill_rate = self.max_requests / self.period
+                    self._tokens = min(self.max_requests, self._tokens + max(0.0, now - self._last_refill) * refill_rate)
+                    self._last_refill = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / refill_rate
+            await asyncio.sleep(delay)
+
+    def record_throttle(self, retry_after=None):
+        """
+        Pauses all requests after the server reported overload. Uses the server's retry_after hint
+        (seconds) when given, otherwise exponential backoff over consecutive throttles; both get
+        jitter. Throttles reported while already paused don't extend the backoff, so a burst of
+        in-flight requests failing together counts once. Returns the remaining pause in seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._total_throttles += 1
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            self._throttle_strikes += 1
+            if retry_after is not None:
+                delay = float(retry_after) + random.uniform(0, self.backoff_base)
+            else:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (self._throttle_strikes - 1))
+                delay *= random.uniform(0.5, 1.0)
+            self._paused_until = now + delay
+            # Start from an empty bucket so requests resume at the refill rate instead of all at once
+            self._tokens = 0.0
+            self._last_refill = self._paused_until
+            return delay
+
+    def record_success(self):
+        """Closes the circuit again: the next throttle starts from the base backoff."""
+        with self._lock:
+            self._throttle_strikes = 0
+
+    def state(self):
+        """Returns a snapshot of the limiter's configuration, load and queueing delay (in seconds)."""
+        with self._lock:
+            return {
+                'name': self.name,
+                'max_concurrent': self.max_concurrent,
+                'max_requests': self.max_requests,
+                'period': self.period,
+                'active': self._active,
+                'queued': len(self._waiters),
+                'available_tokens': round(self._tokens, 2),
+                'total_requests': self._total_requests,
+                'average_wait': round(self._total_wait / self._total_requests, 3) if self._total_requests else 0.0,
+                'max_wait': round(self._max_wait, 3),
+                'last_wait': round(self._last_wait, 3),
+                'paused_for': round(max(0.0, self._paused_until - time.monotonic()), 3),
+                'consecutive_throttles': self._throttle_strikes,
+                'total_throttles': self._total_throttles,
+            }
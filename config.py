@@ -2,6 +2,8 @@
 # This file contains default values for local development
 # In Docker, this file is generated by entrypoint.sh from environment variables
 
+import os
+
 # Navidrome Configuration
 ROOT_ND = ""
 USER_ND = ""
@@ -53,8 +55,79 @@ LLM_TARGET_COMMENT = 'llm_recommendation'
 # History Tracking
 PLAYLIST_HISTORY_FILE = "playlist_history.txt"
 
+# Owner applied to downloaded and organized files
+MUSIC_OWNER_UID = 1000
+MUSIC_OWNER_GID = 1000
+
+# Persistent cache database (tag reads, API lookups)
+CACHE_DB_PATH = os.path.join(TEMP_DOWNLOAD_FOLDER, "re-command-cache.db")
+
+# Album art cache (shared by all downloaders)
+ARTWORK_CACHE_DIR = os.path.join(TEMP_DOWNLOAD_FOLDER, ".artwork_cache")
+ARTWORK_CACHE_MAX_MB = 200
+ARTWORK_NEGATIVE_CACHE_TTL = 300
+
+# Album art normalization before embedding
+ARTWORK_MAX_DIMENSION = 1000
+ARTWORK_JPEG_QUALITY = 85
+ARTWORK_MAX_KB = 300
+
 # Caching for fresh releases (in seconds)
 FRESH_RELEASES_CACHE_DURATION = 300
+# The web UI still serves expired entries this long while a background refresh runs (CLI runs refetch)
+FRESH_RELEASES_STALE_DURATION = 86400
+# Keep the cache on disk too, so restarts and CLI runs start warm
+FRESH_RELEASES_DISK_CACHE = True
+# How often the web UI's background refresher looks for entries close to expiry
+FRESH_RELEASES_REFRESH_INTERVAL = 60
+
+# Shared HTTP client (timeouts in seconds)
+HTTP_TIMEOUT = 30
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_CONNECTIONS_PER_HOST = 10
+HTTP_DNS_CACHE_TTL = 300
+HTTP_KEEPALIVE_TIMEOUT = 30
 
 # Deezer API Rate Limiting
 DEEZER_MAX_CONCURRENT_REQUESTS = 3
+DEEZER_RATE_LIMIT_REQUESTS = 40  # requests allowed per DEEZER_RATE_LIMIT_PERIOD seconds (Deezer's quota is 50 per 5s)
+DEEZER_RATE_LIMIT_PERIOD = 5
+# Pause (in seconds) after Deezer reports quota exhaustion, doubling on consecutive errors up to the max
+DEEZER_BACKOFF_BASE = 1
+DEEZER_BACKOFF_MAX = 60
+
+# Deezer search cache (in seconds): resolved tracks/albums, and lookups that found nothing
+DEEZER_CACHE_TTL = 2592000
+DEEZER_CACHE_MISS_TTL = 86400
+# Album download availability (in seconds); unavailable albums are rechecked sooner
+DEEZER_AVAILABLE_TTL = 604800
+DEEZER_UNAVAILABLE_TTL = 21600
+
+# Send Deezer track/album search variants in concurrent waves of DEEZER_SEARCH_WAVE_SIZE instead of one
+# at a time; the rest of a wave is cancelled once a result scores at least DEEZER_MATCH_THRESHOLD (0-1)
+# against the wanted artist/title
+DEEZER_PARALLEL_SEARCH = True
+DEEZER_SEARCH_WAVE_SIZE = 3
+DEEZER_MATCH_THRESHOLD = 0.9
+
+# Deezer API log: level (DEBUG logs every request), response bodies (very large, off by default),
+# fraction of per-request records to keep, and size-based rotation
+DEEZER_LOG_FILE = "/app/deezer_api_debug.log"
+DEEZER_LOG_LEVEL = "INFO"
+DEEZER_LOG_PAYLOADS = False
+DEEZER_LOG_SAMPLE_RATE = 1.0
+DEEZER_LOG_MAX_BYTES = 5242880
+DEEZER_LOG_BACKUP_COUNT = 3
+
+# Navidrome API concurrency (getSong.view fallbacks during library cleanup)
+NAVIDROME_MAX_CONCURRENT_REQUESTS = 8
+
+# MusicBrainz allows 1 request per second; lookups are cached (in seconds), failed matches for less time
+MUSICBRAINZ_RATE_LIMIT_REQUESTS = 1
+MUSICBRAINZ_RATE_LIMIT_PERIOD = 1
+MUSICBRAINZ_CACHE_TTL = 2592000
+MUSICBRAINZ_CACHE_MISS_TTL = 86400
+
+# Cleanup only the files re-command downloaded (download manifest) instead of scanning the whole library
+CLEANUP_MANIFEST_ONLY = False
@@ -3,7 +3,7 @@
 export REQUESTS_CA_BUNDLE=/etc/ssl/certs/ca-certificates.crt
 
 # Fix permissions for mounted volumes
-chown -R 1000:1000 /app/music /app/temp_downloads
+chown -R "${RECOMMAND_MUSIC_OWNER_UID:-1000}:${RECOMMAND_MUSIC_OWNER_GID:-1000}" /app/music /app/temp_downloads
 
 # Generate config.py from environment variables
 echo "# Generated config.py from Docker environment variables" > config.py
@@ -71,12 +71,86 @@ echo "" >> config.py
 echo "PLAYLIST_HISTORY_FILE = os.getenv(\"PLAYLIST_HISTORY_FILE\", \"/app/playlist_history.txt\")" >> config.py
 echo "" >> config.py
 
+# Owner applied to downloaded and organized files
+echo "MUSIC_OWNER_UID = int(os.getenv(\"MUSIC_OWNER_UID\", \"${RECOMMAND_MUSIC_OWNER_UID:-1000}\"))" >> config.py
+echo "MUSIC_OWNER_GID = int(os.getenv(\"MUSIC_OWNER_GID\", \"${RECOMMAND_MUSIC_OWNER_GID:-1000}\"))" >> config.py
+echo "" >> config.py
+
+# Persistent cache database (tag reads, API lookups)
+echo "CACHE_DB_PATH = os.getenv(\"CACHE_DB_PATH\", os.path.join(TEMP_DOWNLOAD_FOLDER, \"re-command-cache.db\"))" >> config.py
+echo "" >> config.py
+
+# Album art cache (shared by all downloaders)
+echo "ARTWORK_CACHE_DIR = os.getenv(\"ARTWORK_CACHE_DIR\", os.path.join(TEMP_DOWNLOAD_FOLDER, \".artwork_cache\"))" >> config.py
+echo "ARTWORK_CACHE_MAX_MB = int(os.getenv(\"ARTWORK_CACHE_MAX_MB\", \"${RECOMMAND_ARTWORK_CACHE_MAX_MB:-200}\"))" >> config.py
+echo "ARTWORK_NEGATIVE_CACHE_TTL = int(os.getenv(\"ARTWORK_NEGATIVE_CACHE_TTL\", \"${RECOMMAND_ARTWORK_NEGATIVE_CACHE_TTL:-300}\"))" >> config.py
+echo "" >> config.py
+
+# Album art normalization before embedding
+echo "ARTWORK_MAX_DIMENSION = int(os.getenv(\"ARTWORK_MAX_DIMENSION\", \"${RECOMMAND_ARTWORK_MAX_DIMENSION:-1000}\"))" >> config.py
+echo "ARTWORK_JPEG_QUALITY = int(os.getenv(\"ARTWORK_JPEG_QUALITY\", \"${RECOMMAND_ARTWORK_JPEG_QUALITY:-85}\"))" >> config.py
+echo "ARTWORK_MAX_KB = int(os.getenv(\"ARTWORK_MAX_KB\", \"${RECOMMAND_ARTWORK_MAX_KB:-300}\"))" >> config.py
+echo "" >> config.py
+
 # Caching for fresh releases (in seconds)
 echo "FRESH_RELEASES_CACHE_DURATION = int(os.getenv(\"FRESH_RELEASES_CACHE_DURATION\", \"${RECOMMAND_FRESH_RELEASES_CACHE_DURATION:-300}\"))" >> config.py
+echo "FRESH_RELEASES_STALE_DURATION = int(os.getenv(\"FRESH_RELEASES_STALE_DURATION\", \"${RECOMMAND_FRESH_RELEASES_STALE_DURATION:-86400}\"))" >> config.py
+echo "FRESH_RELEASES_DISK_CACHE = os.getenv(\"FRESH_RELEASES_DISK_CACHE\", \"${RECOMMAND_FRESH_RELEASES_DISK_CACHE:-True}\").lower() == \"true\"" >> config.py
+echo "FRESH_RELEASES_REFRESH_INTERVAL = int(os.getenv(\"FRESH_RELEASES_REFRESH_INTERVAL\", \"${RECOMMAND_FRESH_RELEASES_REFRESH_INTERVAL:-60}\"))" >> config.py
+echo "" >> config.py
+
+# Shared HTTP client (timeouts in seconds)
+echo "HTTP_TIMEOUT = float(os.getenv(\"HTTP_TIMEOUT\", \"${RECOMMAND_HTTP_TIMEOUT:-30}\"))" >> config.py
+echo "HTTP_CONNECT_TIMEOUT = float(os.getenv(\"HTTP_CONNECT_TIMEOUT\", \"${RECOMMAND_HTTP_CONNECT_TIMEOUT:-10}\"))" >> config.py
+echo "HTTP_MAX_CONNECTIONS = int(os.getenv(\"HTTP_MAX_CONNECTIONS\", \"${RECOMMAND_HTTP_MAX_CONNECTIONS:-100}\"))" >> config.py
+echo "HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv(\"HTTP_MAX_CONNECTIONS_PER_HOST\", \"${RECOMMAND_HTTP_MAX_CONNECTIONS_PER_HOST:-10}\"))" >> config.py
+echo "HTTP_DNS_CACHE_TTL = int(os.getenv(\"HTTP_DNS_CACHE_TTL\", \"${RECOMMAND_HTTP_DNS_CACHE_TTL:-300}\"))" >> config.py
+echo "HTTP_KEEPALIVE_TIMEOUT = float(os.getenv(\"HTTP_KEEPALIVE_TIMEOUT\", \"${RECOMMAND_HTTP_KEEPALIVE_TIMEOUT:-30}\"))" >> config.py
 echo "" >> config.py
 
 # Deezer API Rate Limiting
 echo "DEEZER_MAX_CONCURRENT_REQUESTS = int(os.getenv(\"DEEZER_MAX_CONCURRENT_REQUESTS\", \"${RECOMMAND_DEEZER_MAX_CONCURRENT_REQUESTS:-3}\"))" >> config.py
+echo "DEEZER_RATE_LIMIT_REQUESTS = int(os.getenv(\"DEEZER_RATE_LIMIT_REQUESTS\", \"${RECOMMAND_DEEZER_RATE_LIMIT_REQUESTS:-40}\"))" >> config.py
+echo "DEEZER_RATE_LIMIT_PERIOD = float(os.getenv(\"DEEZER_RATE_LIMIT_PERIOD\", \"${RECOMMAND_DEEZER_RATE_LIMIT_PERIOD:-5}\"))" >> config.py
+echo "DEEZER_BACKOFF_BASE = float(os.getenv(\"DEEZER_BACKOFF_BASE\", \"${RECOMMAND_DEEZER_BACKOFF_BASE:-1}\"))" >> config.py
+echo "DEEZER_BACKOFF_MAX = float(os.getenv(\"DEEZER_BACKOFF_MAX\", \"${RECOMMAND_DEEZER_BACKOFF_MAX:-60}\"))" >> config.py
+echo "" >> config.py
+
+# Deezer search cache (in seconds): resolved tracks/albums, and lookups that found nothing
+echo "DEEZER_CACHE_TTL = int(os.getenv(\"DEEZER_CACHE_TTL\", \"${RECOMMAND_DEEZER_CACHE_TTL:-2592000}\"))" >> config.py
+echo "DEEZER_CACHE_MISS_TTL = int(os.getenv(\"DEEZER_CACHE_MISS_TTL\", \"${RECOMMAND_DEEZER_CACHE_MISS_TTL:-86400}\"))" >> config.py
+echo "DEEZER_AVAILABLE_TTL = int(os.getenv(\"DEEZER_AVAILABLE_TTL\", \"${RECOMMAND_DEEZER_AVAILABLE_TTL:-604800}\"))" >> config.py
+echo "DEEZER_UNAVAILABLE_TTL = int(os.getenv(\"DEEZER_UNAVAILABLE_TTL\", \"${RECOMMAND_DEEZER_UNAVAILABLE_TTL:-21600}\"))" >> config.py
+echo "" >> config.py
+
+# Concurrent Deezer search resolution
+echo "DEEZER_PARALLEL_SEARCH = os.getenv(\"DEEZER_PARALLEL_SEARCH\", \"${RECOMMAND_DEEZER_PARALLEL_SEARCH:-True}\").lower() == \"true\"" >> config.py
+echo "DEEZER_SEARCH_WAVE_SIZE = int(os.getenv(\"DEEZER_SEARCH_WAVE_SIZE\", \"${RECOMMAND_DEEZER_SEARCH_WAVE_SIZE:-3}\"))" >> config.py
+echo "DEEZER_MATCH_THRESHOLD = float(os.getenv(\"DEEZER_MATCH_THRESHOLD\", \"${RECOMMAND_DEEZER_MATCH_THRESHOLD:-0.9}\"))" >> config.py
+echo "" >> config.py
+
+# Deezer API log
+echo "DEEZER_LOG_FILE = os.getenv(\"DEEZER_LOG_FILE\", \"${RECOMMAND_DEEZER_LOG_FILE:-/app/deezer_api_debug.log}\")" >> config.py
+echo "DEEZER_LOG_LEVEL = os.getenv(\"DEEZER_LOG_LEVEL\", \"${RECOMMAND_DEEZER_LOG_LEVEL:-INFO}\")" >> config.py
+echo "DEEZER_LOG_PAYLOADS = os.getenv(\"DEEZER_LOG_PAYLOADS\", \"${RECOMMAND_DEEZER_LOG_PAYLOADS:-False}\").lower() == \"true\"" >> config.py
+echo "DEEZER_LOG_SAMPLE_RATE = float(os.getenv(\"DEEZER_LOG_SAMPLE_RATE\", \"${RECOMMAND_DEEZER_LOG_SAMPLE_RATE:-1.0}\"))" >> config.py
+echo "DEEZER_LOG_MAX_BYTES = int(os.getenv(\"DEEZER_LOG_MAX_BYTES\", \"${RECOMMAND_DEEZER_LOG_MAX_BYTES:-5242880}\"))" >> config.py
+echo "DEEZER_LOG_BACKUP_COUNT = int(os.getenv(\"DEEZER_LOG_BACKUP_COUNT\", \"${RECOMMAND_DEEZER_LOG_BACKUP_COUNT:-3}\"))" >> config.py
+echo "" >> config.py
+
+# MusicBrainz rate limit and lookup cache (in seconds)
+echo "MUSICBRAINZ_RATE_LIMIT_REQUESTS = int(os.getenv(\"MUSICBRAINZ_RATE_LIMIT_REQUESTS\", \"${RECOMMAND_MUSICBRAINZ_RATE_LIMIT_REQUESTS:-1}\"))" >> config.py
+echo "MUSICBRAINZ_RATE_LIMIT_PERIOD = float(os.getenv(\"MUSICBRAINZ_RATE_LIMIT_PERIOD\", \"${RECOMMAND_MUSICBRAINZ_RATE_LIMIT_PERIOD:-1}\"))" >> config.py
+echo "MUSICBRAINZ_CACHE_TTL = int(os.getenv(\"MUSICBRAINZ_CACHE_TTL\", \"${RECOMMAND_MUSICBRAINZ_CACHE_TTL:-2592000}\"))" >> config.py
+echo "MUSICBRAINZ_CACHE_MISS_TTL = int(os.getenv(\"MUSICBRAINZ_CACHE_MISS_TTL\", \"${RECOMMAND_MUSICBRAINZ_CACHE_MISS_TTL:-86400}\"))" >> config.py
+echo "" >> config.py
+
+# Navidrome API concurrency (getSong.view fallbacks during library cleanup)
+echo "NAVIDROME_MAX_CONCURRENT_REQUESTS = int(os.getenv(\"NAVIDROME_MAX_CONCURRENT_REQUESTS\", \"${RECOMMAND_NAVIDROME_MAX_CONCURRENT_REQUESTS:-8}\"))" >> config.py
+echo "" >> config.py
+
+# Cleanup only the files re-command downloaded (download manifest) instead of scanning the whole library
+echo "CLEANUP_MANIFEST_ONLY = os.getenv(\"CLEANUP_MANIFEST_ONLY\", \"${RECOMMAND_CLEANUP_MANIFEST_ONLY:-False}\").lower() == \"true\"" >> config.py
 echo "" >> config.py
 
 # Set up cron job
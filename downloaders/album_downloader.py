@@ -11,6 +11,7 @@ import importlib
 import config
 import re
 from apis.deezer_api import DeezerAPI
+from utils import fix_ownership
 
 class AlbumDownloader:
     def __init__(self, tagger, album_recommendation_comment=None):
@@ -243,8 +244,7 @@ class AlbumDownloader:
 
             if downloaded_files:
                 # Fix permissions
-                album_dir = os.path.dirname(downloaded_files[0])
-                os.system(f'chown -R 1000:1000 "{album_dir}"')
+                fix_ownership(downloaded_files, root=temp_download_folder, uid=config.MUSIC_OWNER_UID, gid=config.MUSIC_OWNER_GID)
 
             return downloaded_files
         except Exception as e:
@@ -335,7 +335,7 @@ class AlbumDownloader:
             if downloaded_files:
                 print(f"Successfully downloaded album {album_info['artist']} - {album_info['album']} using streamrip")
                 # Fix permissions
-                os.system(f'chown -R 1000:1000 "{found_dir}"')
+                fix_ownership(downloaded_files, root=temp_download_folder, uid=config.MUSIC_OWNER_UID, gid=config.MUSIC_OWNER_GID)
                 return downloaded_files
             else:
                 print(f"ERROR: Successfully called rip() for album {album_info['artist']} - {album_info['album']}, but could not find the downloaded files in {output_dir}.")
@@ -2,7 +2,6 @@ import os
 import asyncio
 import re
 import sys
-import requests
 import json # For pretty printing JSON in debug
 from streamrip.client import DeezerClient
 from streamrip.media import PendingSingle, PendingAlbum, PendingPlaylist
@@ -11,6 +10,7 @@ from streamrip.db import Database, Downloads, Failed
 from config import *
 from utils import Tagger, sanitize_filename, update_status_file
 from apis.navidrome_api import NavidromeAPI
+from apis import http_client
 from downloaders.track_downloader import TrackDownloader
 from typing import Optional
 
@@ -113,7 +113,7 @@ class LinkDownloader:
                 print("Detected Deezer Short Link.")
                 short_code = re.search(deezer_short_re, url).group(1)
                 # Resolve short links to get the actual Deezer URL
-                resolved_url = self._resolve_deezer_short_link(short_code)
+                resolved_url = await self._resolve_deezer_short_link(short_code)
                 if resolved_url:
                     if '/track/' in resolved_url:
                         match = re.search(r'/track/(\d+)', resolved_url)
@@ -157,10 +157,10 @@ class LinkDownloader:
                         print(f"Could not find Deezer ID for {original_platform} playlist {playlist_id} via direct Songlink resolution for type 'playlist'.", file=sys.stderr)
                         # Fallback if Songlink failed for album and playlist
                         print(f"Attempting resilient fallback for {original_platform} playlist ID {playlist_id} by getting metadata and then searching Deezer.", file=sys.stderr)
-                        media_metadata = self._get_media_metadata_from_songlink(playlist_id, original_platform, "album")
+                        media_metadata = await self._get_media_metadata_from_songlink(playlist_id, original_platform, "album")
                         
                         if not media_metadata:
-                             media_metadata = self._get_media_metadata_from_songlink(playlist_id, original_platform, "playlist")
+                             media_metadata = await self._get_media_metadata_from_songlink(playlist_id, original_platform, "playlist")
                         
                         if media_metadata and (media_metadata.get('album') or media_metadata.get('playlist_name')) and media_metadata.get('artist'):
                             artist = media_metadata['artist']
@@ -168,7 +168,7 @@ class LinkDownloader:
                             
                             print(f"Obtained metadata: Artist='{artist}', Title='{album_or_playlist_title}'. Attempting direct Deezer album search.", file=sys.stderr)
                             
-                            deezer_album_link = await self.deezer_api.get_deezer_album_link(artist, album_or_playlist_title)
+                            deezer_album_link, _ = await self.deezer_api.get_deezer_album_link(artist, album_or_playlist_title)
                             if deezer_album_link:
                                 match = re.search(r'deezer\.com\/album\/(\d+)', deezer_album_link)
                                 if match:
@@ -352,7 +352,7 @@ class LinkDownloader:
                     
                     # If still w/o artist or title, try Songlink
                     if not full_song_info.get('artist') and original_platform and original_id:
-                        songlink_metadata = self._get_media_metadata_from_songlink(original_id, original_platform, "song")
+                        songlink_metadata = await self._get_media_metadata_from_songlink(original_id, original_platform, "song")
                         if songlink_metadata:
                             full_song_info['artist'] = songlink_metadata.get('artist', '')
                             full_song_info['title'] = songlink_metadata.get('title', '')
@@ -455,11 +455,11 @@ class LinkDownloader:
             except Exception as e:
                 print(f"Error closing Deezer client session: {e}", file=sys.stderr)
 
-    def _get_media_metadata_from_songlink(self, item_id, platform, type_param="song"):
+    async def _get_media_metadata_from_songlink(self, item_id, platform, type_param="song"):
         """Use Songlink API to get media metadata (song, album, playlist) from other platform ID."""
         try:
             songlink_url = f"{self.songlink_base_url}/links?platform={platform}&type={type_param}&id={item_id}"
-            response = requests.get(songlink_url)
+            response = await http_client.get(songlink_url)
             if response.status_code == 200:
                 data = response.json()
                 print(f"Songlink API response data keys: {list(data.keys())}")
@@ -491,7 +491,7 @@ class LinkDownloader:
         try:
             url = f"{self.songlink_base_url}/links?platform={platform}&type={type_param}&id={item_id}"
             print(f"Calling Songlink API: {url}")
-            response = requests.get(url)
+            response = await http_client.get(url)
             print(f"Songlink API response status: {response.status_code}")
             if response.status_code == 200:
                 data = response.json()
@@ -521,14 +521,14 @@ class LinkDownloader:
                 
                 # If no Deezer link found on Songlink, attempt direct Deezer API search
                 if type_param == "album" or type_param == "song":
-                    media_metadata = self._get_media_metadata_from_songlink(item_id, platform, type_param)
+                    media_metadata = await self._get_media_metadata_from_songlink(item_id, platform, type_param)
                     if media_metadata:
                         if type_param == "album":
                             artist = media_metadata.get('artist', '')
                             album_title = media_metadata.get('album', '')
                             if artist and album_title:
                                 print(f"Attempting direct Deezer album search for artist: '{artist}', album: '{album_title}'", file=sys.stderr)
-                                deezer_album_link = await self.deezer_api.get_deezer_album_link(artist, album_title)
+                                deezer_album_link, _ = await self.deezer_api.get_deezer_album_link(artist, album_title)
                                 if deezer_album_link:
                                     match = re.search(r'deezer\.com\/album\/(\d+)', deezer_album_link)
                                     if match:
@@ -598,11 +598,11 @@ class LinkDownloader:
                     found_files.append(os.path.join(root, filename))
         return found_files
 
-    def _resolve_deezer_short_link(self, short_code):
+    async def _resolve_deezer_short_link(self, short_code):
         """Resolve a Deezer short link to the actual Deezer URL."""
         try:
             short_url = f"https://link.deezer.com/s/{short_code}"
-            response = requests.get(short_url, allow_redirects=True)
+            response = await http_client.get(short_url, allow_redirects=True)
             if response.status_code == 200:
                 final_url = response.url
                 print(f"Resolved short link {short_code} to: {final_url}")
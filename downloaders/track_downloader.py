@@ -10,6 +10,7 @@ from tqdm import tqdm
 import sys
 import importlib
 import config
+from utils import fix_ownership
 
 class TrackDownloader:
     def __init__(self, tagger):
@@ -17,6 +18,7 @@ class TrackDownloader:
         # Initial load, will be reloaded dynamically
         self.temp_download_folder = config.TEMP_DOWNLOAD_FOLDER
         self.deezer_arl = config.DEEZER_ARL
+        self.deezer_api = None
 
     async def download_track(self, song_info, lb_recommendation=None):
         """Downloads a track using the configured method."""
@@ -70,11 +72,8 @@ class TrackDownloader:
                 song_info['release_date'],
                 song_info['recording_mbid'],
                 song_info['source'],
-                song_info.get('album_art')
-            )
-            self.tagger.add_comment_to_file(
-                downloaded_file_path,
-                comment
+                song_info.get('album_art'),
+                comment=comment
             )
             return downloaded_file_path
         else:
@@ -82,18 +81,33 @@ class TrackDownloader:
             return None
 
     async def _get_deezer_link_and_details(self, song_info):
-        """Fetches Deezer link and updates song_info with album details."""
-        from apis.deezer_api import DeezerAPI
-        deezer_api = DeezerAPI()
-        deezer_link = await deezer_api.get_deezer_track_link(song_info['artist'], song_info['title'])
-        if deezer_link:
-            track_id = deezer_link.split('/')[-1]
-            deezer_details = await deezer_api.get_deezer_track_details(track_id)
+        """
+        Fetches Deezer link and updates song_info with album details.
+        Recommendations that were already resolved carry a deezer_id and are not searched again;
+        /track/{id} is only requested when the release date is still missing for tagging.
+        """
+        if self.deezer_api is None:
+            from apis.deezer_api import DeezerAPI
+            self.deezer_api = DeezerAPI()
+        deezer_api = self.deezer_api
+
+        if not song_info.get('deezer_id'):
+            deezer_details = await deezer_api.get_deezer_track_details_from_artist_title(
+                song_info['artist'], song_info['title'], include_release_date=True
+            )
+            if not deezer_details:
+                return None
+            song_info['deezer_id'] = deezer_details['deezer_id']
+            song_info['album'] = deezer_details.get('album') or song_info.get('album')
+            song_info['release_date'] = deezer_details.get('release_date') or song_info.get('release_date')
+            song_info['album_art'] = deezer_details.get('album_art') or song_info.get('album_art')
+        elif not song_info.get('release_date'):
+            deezer_details = await deezer_api.get_deezer_track_details(song_info['deezer_id'])
             if deezer_details:
-                song_info['album'] = deezer_details.get('album', song_info['album'])
-                song_info['release_date'] = deezer_details.get('release_date', song_info['release_date'])
-                song_info['album_art'] = deezer_details.get('album_art', song_info.get('album_art'))
-        return deezer_link
+                song_info['release_date'] = deezer_details.get('release_date')
+                song_info['album_art'] = song_info.get('album_art') or deezer_details.get('album_art')
+
+        return f"https://www.deezer.com/track/{song_info['deezer_id']}"
 
     def _download_track_deemix(self, deezer_link, song_info, temp_download_folder):
         """Downloads a track using deemix."""
@@ -128,8 +142,7 @@ class TrackDownloader:
 
             if downloaded_file:
                 # Fix permissions
-                dir_path = os.path.dirname(downloaded_file)
-                os.system(f'chown -R 1000:1000 "{dir_path}"')
+                fix_ownership([downloaded_file], root=temp_download_folder, uid=config.MUSIC_OWNER_UID, gid=config.MUSIC_OWNER_GID)
 
             return downloaded_file
         except Exception as e:
@@ -215,8 +228,7 @@ class TrackDownloader:
 
             if downloaded_file_path and os.path.exists(downloaded_file_path):
                 # Fix permissions
-                dir_path = os.path.dirname(downloaded_file_path)
-                os.system(f'chown -R 1000:1000 "{dir_path}"')
+                fix_ownership([downloaded_file_path], root=temp_download_folder, uid=config.MUSIC_OWNER_UID, gid=config.MUSIC_OWNER_GID)
                 return downloaded_file_path
             else:
                 print(f"  ❌ Could not find downloaded file for {song_info['artist']} - {song_info['title']}", file=sys.stderr)
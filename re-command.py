@@ -7,20 +7,19 @@ import argparse
 from tqdm import tqdm
 
 from config import *
-from apis.deezer_api import DeezerAPI
-from apis.lastfm_api import LastFmAPI
-from utils import initialize_streamrip_db, update_status_file
 from apis.listenbrainz_api import ListenBrainzAPI
-from apis.navidrome_api import NavidromeAPI
-from apis.llm_api import LlmAPI
-from downloaders.track_downloader import TrackDownloader
-from downloaders.album_downloader import AlbumDownloader
-from utils import remove_empty_folders, Tagger
+
+# The download stack (streamrip, mutagen, Navidrome, Last.fm, LLM clients) is imported inside the
+# functions that need it, so a scheduled run whose ListenBrainz playlist hasn't changed can exit
+# after a single request without loading any of it.
 
 async def process_navidrome_cleanup():
     """
     Processes Navidrome library for cleanup based on ratings and submits feedback.
     """
+    from apis.lastfm_api import LastFmAPI
+    from apis.navidrome_api import NavidromeAPI
+
     print("Starting Navidrome cleanup and feedback submission...")
 
     listenbrainz_api = ListenBrainzAPI(
@@ -54,10 +53,17 @@ async def process_navidrome_cleanup():
     print("Navidrome cleanup and feedback submission finished.")
 
 
-async def process_recommendations(source="all", bypass_playlist_check=False, download_id=None):
+async def process_recommendations(source="all", bypass_playlist_check=False, download_id=None, listenbrainz_api=None):
     """
     Processes recommendations from specified sources (ListenBrainz, Last.fm, or all).
+    listenbrainz_api can be an instance that already probed the playlist, to reuse its fetched data.
     """
+    from apis.lastfm_api import LastFmAPI
+    from apis.navidrome_api import NavidromeAPI
+    from apis.llm_api import LlmAPI
+    from downloaders.track_downloader import TrackDownloader
+    from utils import Tagger, update_status_file
+
     print(f"Starting re-command script for source: {source}...")
     # Clear debug log
     try:
@@ -67,7 +73,6 @@ async def process_recommendations(source="all", bypass_playlist_check=False, dow
         pass
 
     tagger = Tagger()
-    deezer_api = DeezerAPI()
     lastfm_api = LastFmAPI(
         api_key=LASTFM_API_KEY,
         api_secret=LASTFM_API_SECRET,
@@ -76,12 +81,13 @@ async def process_recommendations(source="all", bypass_playlist_check=False, dow
         session_key=LASTFM_SESSION_KEY,
         lastfm_enabled=LASTFM_ENABLED
     )
-    listenbrainz_api = ListenBrainzAPI(
-        root_lb=ROOT_LB,
-        token_lb=TOKEN_LB,
-        user_lb=USER_LB,
-        listenbrainz_enabled=LISTENBRAINZ_ENABLED
-    )
+    if listenbrainz_api is None:
+        listenbrainz_api = ListenBrainzAPI(
+            root_lb=ROOT_LB,
+            token_lb=TOKEN_LB,
+            user_lb=USER_LB,
+            listenbrainz_enabled=LISTENBRAINZ_ENABLED
+        )
     navidrome_api = NavidromeAPI(
         root_nd=ROOT_ND,
         user_nd=USER_ND,
@@ -102,8 +108,9 @@ async def process_recommendations(source="all", bypass_playlist_check=False, dow
     if source in ["all", "listenbrainz"] and LISTENBRAINZ_ENABLED:
         print("\033[1;34m=== LISTENBRAINZ RECOMMENDATIONS ===\033[0m")
         print("\nChecking for new ListenBrainz recommendations...")
-        if bypass_playlist_check or await listenbrainz_api.has_playlist_changed():
-            lb_recs = await listenbrainz_api.get_listenbrainz_recommendations()
+        latest_playlist = None if bypass_playlist_check else await listenbrainz_api.has_playlist_changed()
+        if bypass_playlist_check or latest_playlist:
+            lb_recs = await listenbrainz_api.get_listenbrainz_recommendations(latest_playlist)
             if lb_recs:
                 print(f"Found {len(lb_recs)} new ListenBrainz recommendations.")
                 for song in lb_recs:
@@ -160,6 +167,8 @@ async def process_recommendations(source="all", bypass_playlist_check=False, dow
                         processed_llm_recs.append(rec)
                         print(f"  - {rec['artist']} - {rec['title']} ({rec['album']})")
 
+                    await listenbrainz_api.enrich_recommendations(processed_llm_recs)
+
                     all_recommendations.extend(processed_llm_recs)
                 else:
                     print("LLM failed to generate recommendations.")
@@ -232,6 +241,10 @@ async def process_fresh_releases_albums(download_id=None):
     """
     Downloads albums from Fresh Releases.
     """
+    from apis.navidrome_api import NavidromeAPI
+    from downloaders.album_downloader import AlbumDownloader
+    from utils import Tagger, update_status_file
+
     print("Starting re-command script for fresh releases albums...")
 
     tagger = Tagger()
@@ -321,10 +334,15 @@ async def process_fresh_releases_albums(download_id=None):
     title = "Download Complete"
     update_status_file(download_id, "completed", message, title, current_track_count=downloaded_count, total_track_count=total_albums)
 
-if __name__ == "__main__":
-    # Initialize streamrip database at the very start
-    initialize_streamrip_db()
+async def listenbrainz_playlist_unchanged(listenbrainz_api):
+    """Runs the cheap ListenBrainz change probe; errors count as 'changed' so the full run decides."""
+    try:
+        return not await listenbrainz_api.probe_playlist_changed()
+    except Exception as e:
+        print(f"ListenBrainz playlist probe failed, running the full check: {e}")
+        return False
 
+if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Re-command Recommendation Script.")
     parser.add_argument(
         "--source",
@@ -350,6 +368,28 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
+    # ListenBrainz is the only source of this run: if its playlist hasn't changed there is nothing to do
+    listenbrainz_api = None
+    listenbrainz_only = args.source == "listenbrainz" or (
+        args.source == "all" and not LASTFM_ENABLED and not (LLM_ENABLED and LLM_API_KEY)
+    )
+    # Runs started from the web UI carry a download id and report their status, so they always go the full way
+    if listenbrainz_only and LISTENBRAINZ_ENABLED and not args.cleanup and not args.bypass_playlist_check and not args.download_id:
+        listenbrainz_api = ListenBrainzAPI(
+            root_lb=ROOT_LB,
+            token_lb=TOKEN_LB,
+            user_lb=USER_LB,
+            listenbrainz_enabled=LISTENBRAINZ_ENABLED
+        )
+        if asyncio.run(listenbrainz_playlist_unchanged(listenbrainz_api)):
+            print("ListenBrainz playlist has not changed. Nothing to do.")
+            sys.exit(0)
+
+    from utils import initialize_streamrip_db, update_status_file
+
+    # Initialize streamrip database at the very start
+    initialize_streamrip_db()
+
     # Initial status update
     update_status_file(args.download_id, "in_progress", "Download initiated.")
 
@@ -360,7 +400,7 @@ if __name__ == "__main__":
             asyncio.run(process_navidrome_cleanup())
             update_status_file(args.download_id, "completed", "Cleanup finished successfully.", "Cleanup completed")
         else:
-            asyncio.run(process_recommendations(source=args.source, bypass_playlist_check=args.bypass_playlist_check, download_id=args.download_id))
+            asyncio.run(process_recommendations(source=args.source, bypass_playlist_check=args.bypass_playlist_check, download_id=args.download_id, listenbrainz_api=listenbrainz_api))
     except Exception as e:
         update_status_file(args.download_id, "failed", f"Download failed: {e}", f"Download failed: {e}")
         raise # Re-raise the exception after updating status
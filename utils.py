@@ -2,16 +2,27 @@ from datetime import datetime
 import json
 import os
 import re
+import base64
+import hashlib
+import io
+import sqlite3
+import threading
+import time
 import requests
 import imghdr
-from mutagen.id3 import ID3, COMM, APIC, TPE1, TALB, TIT2, TDRC, TXXX, UFID, error as ID3Error
-from mutagen import File, MutagenError
-from mutagen.mp3 import MP3
-from mutagen.flac import FLAC
+from concurrent.futures import ThreadPoolExecutor
+from mutagen.id3 import ID3, COMM, APIC, TPE1, TALB, TIT2, TDRC, TXXX, UFID, ID3NoHeaderError, error as ID3Error
+from mutagen import MutagenError
+from mutagen.flac import FLAC, Picture
 from mutagen.oggvorbis import OggVorbis
-from mutagen.m4a import M4A
+from mutagen.mp4 import MP4, MP4Cover
 from streamrip.db import Database, Downloads, Failed
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 from config import *
+from apis import http_client
 
 def initialize_streamrip_db():
     """Initializes the streamrip database, ensuring tables exist."""
@@ -54,22 +65,290 @@ def sanitize_filename(filename):
     """Replaces problematic characters in filenames with underscores."""
     return re.sub(r'[\\/:*?"<>|]', '_', filename)
 
-def remove_empty_folders(path):
-    """Removes empty folders from a given path."""
-    for root, dirs, files in os.walk(path, topdown=False):
-        for dir in dirs:
-            full_path = os.path.join(root, dir)
-            if not os.listdir(full_path):
-                try:
-                    os.rmdir(full_path)
-                except OSError as e:
-                    print(f"Error removing folder: {full_path}. Error: {e}")
+def prune_empty_dirs(directories, root):
+    """
+    Removes the given directories and their ancestors, up to but excluding root, as long as they are empty.
+    Used instead of walking a whole tree when we know which directories files were removed from.
+    """
+    root = os.path.abspath(root)
+    # Deepest first so a parent is only tried after its emptied children are gone
+    for directory in sorted({os.path.abspath(d) for d in directories}, key=lambda d: d.count(os.sep), reverse=True):
+        while directory != root and directory.startswith(root + os.sep):
+            try:
+                os.rmdir(directory)
+                print(f"Removed empty directory: {directory}")
+            except FileNotFoundError:
+                pass
+            except OSError:
+                break  # Not empty, so none of its ancestors are either
+            directory = os.path.dirname(directory)
+
+def fix_ownership(paths, root=None, uid=None, gid=None):
+    """
+    Sets the owner of each path, and of its parent directories below root, to uid:gid (MUSIC_OWNER_UID/GID by default).
+    Only the given files and the directories that hold them are touched, so it stays cheap on large libraries.
+    """
+    uid = MUSIC_OWNER_UID if uid is None else uid
+    gid = MUSIC_OWNER_GID if gid is None else gid
+    root = os.path.abspath(root) if root else None
+
+    targets = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        targets.add(path)
+        if root:
+            parent = os.path.dirname(path)
+            while parent.startswith(root + os.sep) and parent not in targets:
+                targets.add(parent)
+                parent = os.path.dirname(parent)
+
+    for target in targets:
+        try:
+            os.chown(target, uid, gid)
+        except OSError as e:
+            print(f"Could not change ownership of {target}: {e}")
+
+class PersistentCache:
+    """
+    Small key/value store backed by SQLite in WAL mode, shared by every process pointing at CACHE_DB_PATH.
+    Values are stored as JSON, grouped by namespace, and optionally expire after a TTL in seconds.
+    Database errors are reported and treated as cache misses so a broken cache never stops a run.
+    """
+    _local = threading.local()
+
+    def __init__(self, namespace, db_path=None, default_ttl=None):
+        self.namespace = namespace
+        self.db_path = db_path or CACHE_DB_PATH
+        self.default_ttl = default_ttl
+
+    def _connection(self):
+        """Returns this thread's connection to the cache database, creating the schema on first use."""
+        connections = getattr(PersistentCache._local, 'connections', None)
+        if connections is None:
+            connections = PersistentCache._local.connections = {}
+        connection = connections.get(self.db_path)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "updated_at REAL NOT NULL, expires_at REAL, PRIMARY KEY (namespace, key))"
+            )
+            connections[self.db_path] = connection
+        return connection
+
+    def get_entry(self, key):
+        """Returns (value, updated_at) for a live entry, or None if it is missing or expired."""
+        try:
+            row = self._connection().execute(
+                "SELECT value, updated_at, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Cache read error ({self.namespace}): {e}")
+            return None
+        if row is None or (row[2] is not None and row[2] < time.time()):
+            return None
+        return json.loads(row[0]), row[1]
+
+    def get(self, key, default=None):
+        """Returns the cached value for key, or default if it is missing or expired."""
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Stores value under key. ttl overrides the default TTL; no TTL means the entry never expires."""
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, updated_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), now, now + ttl if ttl else None)
+            )
+        except (sqlite3.Error, OSError, TypeError) as e:
+            print(f"Cache write error ({self.namespace}): {e}")
+
+    def delete(self, key):
+        """Removes key from the cache if present."""
+        try:
+            self._connection().execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except (sqlite3.Error, OSError) as e:
+            print(f"Cache delete error ({self.namespace}): {e}")
+
+    def items(self):
+        """Returns a list of (key, value) pairs for every live entry in this namespace."""
+        try:
+            rows = self._connection().execute(
+                "SELECT key, value FROM cache WHERE namespace = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (self.namespace, time.time())
+            ).fetchall()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Cache read error ({self.namespace}): {e}")
+            return []
+        return [(key, json.loads(value)) for key, value in rows]
+
+class ArtworkCache:
+    """
+    On-disk album art cache keyed by URL. Images are stored once per content hash under ARTWORK_CACHE_DIR,
+    evicted least-recently-used first once they exceed ARTWORK_CACHE_MAX_MB, and failed downloads are
+    remembered for ARTWORK_NEGATIVE_CACHE_TTL seconds. Threads asking for the same URL share one download.
+    """
+    _lock = threading.Lock()
+    _inflight = {}
+    # Hits only refresh the LRU timestamp when it is older than this, to avoid a write per tagged track
+    _touch_interval = 60
+    # Running size of each cache directory, read from the index once and then kept up to date by store()
+    _sizes = {}
+    # Eviction trims the cache to this fraction of max_bytes, so the next few stores don't trigger it again
+    _evict_target = 0.9
+
+    def __init__(self, cache_dir=None, max_bytes=None, negative_ttl=None):
+        self.cache_dir = cache_dir or ARTWORK_CACHE_DIR
+        self.max_bytes = ARTWORK_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.negative_ttl = ARTWORK_NEGATIVE_CACHE_TTL if negative_ttl is None else negative_ttl
+        self.index = PersistentCache("artwork")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def lookup(self, url):
+        """Returns (image_data, mime_type) on a hit, False for a cached failure and None on a miss."""
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        if entry.get('failed'):
+            return False
+        try:
+            with open(self._blob_path(entry['sha256']), 'rb') as f:
+                image_data = f.read()
+        except OSError:
+            self.index.delete(url)
+            return None
+
+        now = time.time()
+        if now - entry.get('last_used', 0) > self._touch_interval:
+            entry['last_used'] = now
+            self.index.set(url, entry)
+        return image_data, entry['mime']
+
+    def get(self, url):
+        """Returns (image_data, mime_type) for the image at url, downloading it on a miss, or None if unavailable."""
+        cached = self.lookup(url)
+        if cached is not None:
+            return cached or None
+
+        with ArtworkCache._lock:
+            event = ArtworkCache._inflight.get(url)
+            is_owner = event is None
+            if is_owner:
+                event = ArtworkCache._inflight[url] = threading.Event()
+
+        if not is_owner:
+            # Another thread is already downloading this cover
+            event.wait()
+            return self.lookup(url) or None
+
+        try:
+            cached = self.lookup(url)
+            if cached is not None:
+                return cached or None
+            return self._download(url)
+        finally:
+            with ArtworkCache._lock:
+                ArtworkCache._inflight.pop(url, None)
+            event.set()
+
+    def _download(self, url):
+        """Downloads an image, stores it in the cache and returns (image_data, mime_type), or None on failure."""
+        try:
+            response = http_client.request_sync("GET", url)
+            response.raise_for_status()
+            image_data = response.content
+        except requests.exceptions.RequestException as e:
+            print(f"Error downloading album art from {url}: {e}")
+            self.index.set(url, {'failed': True}, ttl=self.negative_ttl)
+            return None
+
+        image_type = imghdr.what(None, h=image_data)
+        if not image_type:
+            print(f"Could not determine image type for {url}. Skipping embedding.")
+            self.index.set(url, {'failed': True}, ttl=self.negative_ttl)
+            return None
+
+        mime_type = f"image/{image_type}"
+        self.store(url, image_data, mime_type)
+        return image_data, mime_type
+
+    def store(self, key, image_data, mime_type):
+        """Stores image data under a key (a URL or any other identifier) and evicts old entries if over budget."""
+        digest = hashlib.sha256(image_data).hexdigest()
+        blob_path = self._blob_path(digest)
+        new_blob = not os.path.exists(blob_path)
+        try:
+            if new_blob:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                temp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    f.write(image_data)
+                os.replace(temp_path, blob_path)
+        except OSError as e:
+            print(f"Could not write album art to cache: {e}")
+            return
+
+        self.index.set(key, {'sha256': digest, 'mime': mime_type, 'size': len(image_data), 'last_used': time.time()})
+
+        with ArtworkCache._lock:
+            if self.cache_dir not in ArtworkCache._sizes:
+                ArtworkCache._sizes[self.cache_dir] = sum(blob['size'] for blob in self._blobs().values())
+            elif new_blob:
+                ArtworkCache._sizes[self.cache_dir] += len(image_data)
+            over_budget = ArtworkCache._sizes[self.cache_dir] > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def _blobs(self):
+        """Groups the index by stored image: {sha256: {'size', 'last_used', 'keys'}}."""
+        blobs = {}
+        for key, entry in self.index.items():
+            if entry.get('failed'):
+                continue
+            blob = blobs.setdefault(entry['sha256'], {'size': entry['size'], 'last_used': 0, 'keys': []})
+            blob['last_used'] = max(blob['last_used'], entry.get('last_used', 0))
+            blob['keys'].append(key)
+        return blobs
+
+    def _evict(self):
+        """Removes least recently used images until the cache is back under its eviction target."""
+        blobs = self._blobs()
+        total_size = sum(blob['size'] for blob in blobs.values())
+        for digest, blob in sorted(blobs.items(), key=lambda item: item[1]['last_used']):
+            if total_size <= self.max_bytes * self._evict_target:
+                break
+            for key in blob['keys']:
+                self.index.delete(key)
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+            total_size -= blob['size']
+
+        with ArtworkCache._lock:
+            ArtworkCache._sizes[self.cache_dir] = total_size
 
 class Tagger:
     def __init__(self, album_recommendation_comment=None):
         self.target_comment = TARGET_COMMENT
         self.lastfm_target_comment = LASTFM_TARGET_COMMENT
         self.album_recommendation_comment = album_recommendation_comment
+        self.artwork_cache = ArtworkCache()
+
+    # Album art normalization runs on this shared pool, once per cover even when several tracks ask at the same time
+    _artwork_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="artwork")
+    _artwork_lock = threading.RLock()
+    _artwork_futures = {}
 
     def add_comment_to_file(self, file_path, comment):
         """Add a comment to a specific audio file."""
@@ -82,116 +361,171 @@ class Tagger:
         with open('/app/debug.log', 'a') as f:
             f.write(f"ADD_COMMENT_START: {debug_info}\n")
 
+        if self.write_tags(file_path, comment=comment):
+            print(f"Added comment to {file_path}")
+
+    def _fetch_album_art(self, album_art_url):
+        """
+        Returns normalized (image_data, mime_type) album art, or None if it can't be embedded.
+        Normalized covers are cached next to the originals, keyed by URL and the normalization settings.
+        """
+        key = f"normalized:{ARTWORK_MAX_DIMENSION}:{ARTWORK_JPEG_QUALITY}:{ARTWORK_MAX_KB}:{album_art_url}"
+        cached = self.artwork_cache.lookup(key)
+        if cached:
+            return cached
+
+        with Tagger._artwork_lock:
+            future = Tagger._artwork_futures.get(key)
+            if future is None:
+                future = Tagger._artwork_executor.submit(self._prepare_album_art, album_art_url, key)
+                Tagger._artwork_futures[key] = future
+                future.add_done_callback(lambda _: Tagger._release_artwork_future(key))
+        return future.result()
+
+    @staticmethod
+    def _release_artwork_future(key):
+        with Tagger._artwork_lock:
+            Tagger._artwork_futures.pop(key, None)
+
+    def _prepare_album_art(self, album_art_url, key):
+        """Fetches album art through the artwork cache, normalizes it and caches the result under key."""
+        album_art = self.artwork_cache.get(album_art_url)
+        if album_art is None:
+            return None
+        normalized = self._normalize_album_art(*album_art)
+        self.artwork_cache.store(key, *normalized)
+        return normalized
+
+    def _normalize_album_art(self, image_data, mime_type):
+        """
+        Downscales album art to ARTWORK_MAX_DIMENSION and recompresses it as JPEG at ARTWORK_JPEG_QUALITY,
+        lowering quality and then size until it fits in ARTWORK_MAX_KB. Returns the original if Pillow is unavailable.
+        """
+        if Image is None:
+            return image_data, mime_type
+
+        max_bytes = ARTWORK_MAX_KB * 1024
         try:
-            if file_path.lower().endswith('.mp3'):
+            with Image.open(io.BytesIO(image_data)) as image:
+                if mime_type == 'image/jpeg' and max(image.size) <= ARTWORK_MAX_DIMENSION and len(image_data) <= max_bytes:
+                    return image_data, mime_type
+
+                image = image.convert('RGB')
+                image.thumbnail((ARTWORK_MAX_DIMENSION, ARTWORK_MAX_DIMENSION), Image.LANCZOS)
+                quality = ARTWORK_JPEG_QUALITY
+                while True:
+                    buffer = io.BytesIO()
+                    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+                    if buffer.tell() <= max_bytes or max(image.size) <= 300:
+                        break
+                    if quality > 60:
+                        quality -= 10
+                    else:
+                        image = image.resize((int(image.width * 0.8), int(image.height * 0.8)), Image.LANCZOS)
+        except Exception as e:
+            print(f"Could not normalize album art, embedding it as-is: {e}")
+            return image_data, mime_type
+
+        return buffer.getvalue(), 'image/jpeg'
+
+    def _embed_album_art(self, file_path, album_art_url):
+        """Downloads and embeds album art into the audio file."""
+        if not album_art_url:
+            print(f"No album art URL provided for {file_path}.")
+            return
+
+        if self.write_tags(file_path, album_art_url=album_art_url):
+            print(f"Embedded album art into {file_path}")
+
+    def write_tags(self, file_path, metadata=None, comment=None, recording_mbid=None, album_art_url=None):
+        """
+        Writes text tags, comment, MusicBrainz recording ID and album art to a file in one Mutagen load and save.
+        metadata maps 'artist', 'title', 'album' and 'date' to their values; anything left as None is not touched.
+        Returns True if the file was saved.
+        """
+        metadata = {key: value for key, value in (metadata or {}).items() if value is not None}
+        album_art = self._fetch_album_art(album_art_url) if album_art_url else None
+        file_ext = os.path.splitext(file_path)[1].lower()
+
+        try:
+            if file_ext == '.mp3':
                 # For MP3s, use ID3 tags
                 try:
                     audio = ID3(file_path)
-                except error.ID3NoHeaderError:
+                except ID3NoHeaderError:
                     audio = ID3()
 
-                audio.add(COMM(encoding=3, lang='eng', desc='', text=comment))
+                frames = {'artist': TPE1, 'title': TIT2, 'album': TALB, 'date': TDRC}
+                for key, value in metadata.items():
+                    if key in frames:
+                        audio.add(frames[key](encoding=3, text=[value]))
+                if comment is not None:
+                    audio.add(COMM(encoding=3, lang='eng', desc='', text=[comment]))
+                if recording_mbid:
+                    # Using TXXX for custom text information
+                    audio.add(TXXX(encoding=3, desc='MUSICBRAINZ_RECORDINGID', text=[recording_mbid]))
+                    # Also set UFID with the MusicBrainz URL
+                    audio.add(UFID(owner='http://musicbrainz.org', data=f'http://musicbrainz.org/recording/{recording_mbid}'.encode('utf-8')))
+                if album_art:
+                    audio.add(APIC(encoding=3, mime=album_art[1], type=3, desc='Cover', data=album_art[0]))
                 audio.save(file_path, v2_version=3, v1=2)
-                print(f"Added ID3 comment to MP3 file: {file_path}")
-
-            elif file_path.lower().endswith('.flac'):
-                # For FLAC, use Vorbis comments
-                audio = FLAC(file_path)
-                audio['comment'] = comment
-                audio.save()
-                print(f"Added Vorbis comment to FLAC file: {file_path}")
 
-            elif file_path.lower().endswith(('.ogg', '.oga')):
-                # For OggVorbis, use Vorbis comments
-                audio = OggVorbis(file_path)
-                audio['comment'] = comment
+            elif file_ext in ('.flac', '.ogg', '.oga'):
+                # For FLAC and OggVorbis, use Vorbis comments
+                audio = FLAC(file_path) if file_ext == '.flac' else OggVorbis(file_path)
+                for key, value in metadata.items():
+                    audio[key] = value
+                if comment is not None:
+                    audio['comment'] = comment
+                if recording_mbid:
+                    audio['musicbrainz_recordingid'] = recording_mbid
+                if album_art:
+                    picture = Picture()
+                    picture.data = album_art[0]
+                    picture.type = 3
+                    picture.mime = album_art[1]
+                    if file_ext == '.flac':
+                        audio.clear_pictures()
+                        audio.add_picture(picture)
+                    else:
+                        # Ogg has no picture block, the picture goes into a base64 Vorbis comment
+                        audio['metadata_block_picture'] = [base64.b64encode(picture.write()).decode('ascii')]
                 audio.save()
-                print(f"Added Vorbis comment to OggVorbis file: {file_path}")
 
-            elif file_path.lower().endswith('.m4a'):
+            elif file_ext == '.m4a':
                 # For M4A, use iTunes-style atoms
-                audio = M4A(file_path)
-                audio['\xa9cmt'] = [comment]
+                audio = MP4(file_path)
+                atoms = {'artist': '\xa9ART', 'title': '\xa9nam', 'album': '\xa9alb', 'date': '\xa9day'}
+                for key, value in metadata.items():
+                    if key in atoms:
+                        audio[atoms[key]] = [value]
+                if comment is not None:
+                    audio['\xa9cmt'] = [comment]
+                if recording_mbid:
+                    # M4A does not have a standard tag for MusicBrainz ID, use a custom one
+                    audio['----:com.apple.iTunes:MusicBrainz Recording Id'] = [recording_mbid.encode('utf-8')]
+                if album_art:
+                    image_format = MP4Cover.FORMAT_PNG if album_art[1] == 'image/png' else MP4Cover.FORMAT_JPEG
+                    audio['covr'] = [MP4Cover(album_art[0], imageformat=image_format)]
                 audio.save()
-                print(f"Added iTunes comment to M4A file: {file_path}")
 
             else:
-                print(f"Unsupported file type for adding comment: {file_path}")
-                return
-
-        except Exception as e:
-            print(f"Error adding comment to {file_path}: {e}")
-            import traceback
-            traceback.print_exc()
-
-    def _embed_album_art(self, file_path, album_art_url):
-        """Downloads and embeds album art into the audio file."""
-        if not album_art_url:
-            print(f"No album art URL provided for {file_path}.")
-            return
-
-        try:
-            response = requests.get(album_art_url, stream=True)
-            response.raise_for_status()
-            image_data = response.content
+                print(f"Unsupported file type for tagging: {file_path}")
+                return False
 
-            image_type = imghdr.what(None, h=image_data)
-            if not image_type:
-                print(f"Could not determine image type for {album_art_url}. Skipping embedding.")
-                return
-
-            mime_type = f"image/{image_type}"
-
-            if file_path.lower().endswith('.mp3'):
-                audio = MP3(file_path, ID3=ID3)
-                audio.tags.add(
-                    APIC(
-                        encoding=3,
-                        mime=mime_type,
-                        type=3,
-                        desc='Cover',
-                        data=image_data
-                    )
-                )
-                audio.save()
-                print(f"Embedded album art into MP3: {file_path}")
-            elif file_path.lower().endswith('.flac'):
-                audio = FLAC(file_path)
-                image = FLAC.Picture()
-                image.data = image_data
-                image.type = 3
-                image.mime = mime_type
-                audio.add_picture(image)
-                audio.save()
-                print(f"Embedded album art into FLAC: {file_path}")
-            elif file_path.lower().endswith(('.ogg', '.oga')):
-                audio = OggVorbis(file_path)
-                image = OggVorbis.Picture()
-                image.data = image_data
-                image.type = 3
-                image.mime = mime_type
-                audio.add_picture(image)
-                audio.save()
-                print(f"Embedded album art into OggVorbis: {file_path}")
-            elif file_path.lower().endswith('.m4a'):
-                audio = M4A(file_path)
-                image = M4A.Picture()
-                image.data = image_data
-                image.type = 3
-                image.mime = mime_type
-                audio.tags['covr'] = [image]
-                audio.save()
-                print(f"Embedded album art into M4A: {file_path}")
-            else:
-                print(f"Unsupported file type for album art embedding: {file_path}")
+            return True
 
-        except requests.exceptions.RequestException as e:
-            print(f"Error downloading album art from {album_art_url}: {e}")
+        except MutagenError as e:
+            print(f"Error tagging {file_path} with Mutagen: {e}")
         except Exception as e:
-            print(f"Error embedding album art into {file_path}: {e}")
+            print(f"An unexpected error occurred while tagging {file_path}: {e}")
+        return False
 
-    def tag_track(self, file_path, artist, title, album, release_date, recording_mbid, source, album_art_url=None, is_album_recommendation=False):
-        """Tags a track with metadata using Mutagen and embeds album art."""
+    def tag_track(self, file_path, artist, title, album, release_date, recording_mbid, source, album_art_url=None, is_album_recommendation=False, comment=None):
+        """
+        Tags a track with metadata using Mutagen and embeds album art, all in a single write.
+        comment overrides the recommendation comment derived from source.
+        """
         
         # If title is not provided, try to extract it from the filename
         if not title:
@@ -218,80 +552,16 @@ class Tagger:
 
             title = extracted_title # Ensure title is set
             
-        if is_album_recommendation and self.album_recommendation_comment:
-            comment = self.album_recommendation_comment
-        else:
-            comment = self.target_comment if source == "ListenBrainz" else self.lastfm_target_comment
-        
-        try:
-            audio = File(file_path)
-            if audio is None:
-                print(f"Could not open audio file with Mutagen: {file_path}")
-                return
-
-            if file_path.lower().endswith('.mp3'):
-                # For MP3s, use ID3 tags
-                if audio.tags is None:
-                    audio.tags = ID3()
-                
-                audio.tags.add(TPE1(encoding=3, text=[artist]))
-                audio.tags.add(TIT2(encoding=3, text=[title]))
-                audio.tags.add(TALB(encoding=3, text=[album]))
-                audio.tags.add(TDRC(encoding=3, text=[release_date]))
-                audio.tags.add(COMM(encoding=3, lang='eng', desc='', text=[comment]))
-                
-                if recording_mbid:
-                    # Using TXXX for custom text information
-                    audio.tags.add(TXXX(encoding=3, desc='MUSICBRAINZ_RECORDINGID', text=[recording_mbid]))
-                    # Also set UFID with the MusicBrainz URL
-                    audio.tags.add(UFID(owner='http://musicbrainz.org', data=f'http://musicbrainz.org/recording/{recording_mbid}'.encode('utf-8')))
-
-            elif file_path.lower().endswith('.flac'):
-                # For FLAC, use Vorbis comments
-                audio['artist'] = artist
-                audio['title'] = title
-                audio['album'] = album
-                audio['date'] = release_date
-                audio['comment'] = comment
-                if recording_mbid:
-                    audio['musicbrainz_recordingid'] = recording_mbid
-
-            elif file_path.lower().endswith(('.ogg', '.oga')):
-                # For OggVorbis, use Vorbis comments
-                audio['artist'] = artist
-                audio['title'] = title
-                audio['album'] = album
-                audio['date'] = release_date
-                audio['comment'] = comment
-                if recording_mbid:
-                    audio['musicbrainz_recordingid'] = recording_mbid
-
-            elif file_path.lower().endswith('.m4a'):
-                # For M4A, use iTunes-style atoms
-                audio['\xa9ART'] = [artist]
-                audio['\xa9nam'] = [title]
-                audio['\xa9alb'] = [album]
-                audio['\xa9day'] = [release_date]
-                audio['\xa9cmt'] = [comment]
-                if recording_mbid:
-                    # M4A does not have a standard tag for MusicBrainz ID, use a custom one
-                    audio['----:com.apple.iTunes:MusicBrainz Recording Id'] = [recording_mbid.encode('utf-8')]
-
+        if comment is None:
+            if is_album_recommendation and self.album_recommendation_comment:
+                comment = self.album_recommendation_comment
             else:
-                print(f"Unsupported file type for tagging: {file_path}")
-                return
+                comment = self.target_comment if source == "ListenBrainz" else self.lastfm_target_comment
 
-            audio.save()
+        metadata = {'artist': artist, 'title': title, 'album': album, 'date': release_date}
+        if self.write_tags(file_path, metadata, comment=comment, recording_mbid=recording_mbid, album_art_url=album_art_url):
             print(f"Successfully tagged {file_path} with Mutagen.")
 
-            if album_art_url:
-                self._embed_album_art(file_path, album_art_url)
-
-        except MutagenError as e:
-            print(f"Error tagging {file_path} with Mutagen: {e}")
-        except Exception as e:
-            print(f"An unexpected error occurred while tagging {file_path}: {e}")
-
     def get_album_art(self, album_id, salt, token):
         """Fetches album art from Navidrome."""
         url = f"{ROOT_ND}/rest/getCoverArt.view"
@@ -305,7 +575,7 @@ class Tagger:
             'size': 1200
         }
         try:
-            response = requests.get(url, params=params, stream=True)
+            response = http_client.request_sync("GET", url, params=params)
             response.raise_for_status()
             return response.content
         except requests.exceptions.RequestException as e:
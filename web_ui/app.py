@@ -53,6 +53,9 @@ navidrome_api_global = NavidromeAPI(
 deezer_api_global = DeezerAPI()
 link_downloader_global = LinkDownloader(tagger_global, navidrome_api_global, deezer_api_global)
 
+# Keep cached fresh releases (and their Deezer availability) warm between page loads
+ListenBrainzAPI.start_fresh_releases_refresher()
+
 # --- Helper Functions ---
 def validate_deemix_arl(arl_to_validate):
     """
@@ -591,40 +594,22 @@ async def get_fresh_releases():
     try:
         listenbrainz_api = ListenBrainzAPI(ROOT_LB, TOKEN_LB, USER_LB, LISTENBRAINZ_ENABLED)
         
+        # Releases and their Deezer availability come from the shared cache, refreshed in the background
         lb_fetch_start_time = time.perf_counter()
-        data = await listenbrainz_api.get_fresh_releases()
+        data = await listenbrainz_api.get_fresh_releases(check_availability=deezer_api_global.check_album_download_availability)
         lb_fetch_end_time = time.perf_counter()
         lb_fetch_duration = (lb_fetch_end_time - lb_fetch_start_time) * 1000
-        server_timing_metrics.append(f"lb_fetch;dur={lb_fetch_duration:.2f};desc=\"ListenBrainz Fetch\"")
-        print(f"ListenBrainz API fetch time: {lb_fetch_duration:.2f}ms")
+        server_timing_metrics.append(f"lb_fetch;dur={lb_fetch_duration:.2f};desc=\"Fresh Releases and Deezer Availability\"")
+        print(f"Fresh releases fetch time: {lb_fetch_duration:.2f}ms")
 
-        releases = data.get('payload', {}).get('releases', [])
+        processed_releases = data.get('payload', {}).get('releases', [])
 
-        if not releases:
+        if not processed_releases:
             print("No fresh ListenBrainz releases found.")
             response = jsonify({"status": "info", "message": "No fresh ListenBrainz releases found."})
             response.headers['Server-Timing'] = ", ".join(server_timing_metrics)
             return response
 
-        # Parallelize Deezer availability checks
-        deezer_checks_start_time = time.perf_counter()
-        deezer_tasks = []
-        for release in releases:
-            artist = release['artist_credit_name']
-            album = release['release_name']
-            deezer_tasks.append(deezer_api_global.check_album_download_availability(artist, album))
-        
-        is_available_on_deezer_results = await asyncio.gather(*deezer_tasks)
-        deezer_checks_end_time = time.perf_counter()
-        deezer_checks_duration = (deezer_checks_end_time - deezer_checks_start_time) * 1000
-        server_timing_metrics.append(f"deezer_checks;dur={deezer_checks_duration:.2f};desc=\"Deezer Availability Checks\"")
-        print(f"Deezer availability checks (parallelized) time: {deezer_checks_duration:.2f}ms for {len(releases)} releases")
-
-        processed_releases = []
-        for i, release in enumerate(releases):
-            release['is_available_on_deezer'] = is_available_on_deezer_results[i]
-            processed_releases.append(release)
-
         print(f"ListenBrainz fresh releases found: {len(processed_releases)}")
         
         overall_end_time = time.perf_counter()
@@ -771,9 +756,13 @@ async def get_llm_playlist():
             available_recommendations = []
             for rec in recommendations:
                 try:
-                    # Check if track is available on Deezer
-                    deezer_link = await deezer_api_global.get_deezer_track_link(rec['artist'], rec['title'])
-                    if deezer_link:
+                    # Check if track is available on Deezer, keeping the resolution for the download step
+                    deezer_details = await deezer_api_global.get_deezer_track_details_from_artist_title(rec['artist'], rec['title'])
+                    if deezer_details:
+                        rec['deezer_id'] = deezer_details['deezer_id']
+                        rec['album'] = deezer_details.get('album', rec.get('album'))
+                        rec['release_date'] = deezer_details.get('release_date')
+                        rec['album_art'] = deezer_details.get('album_art')
                         available_recommendations.append(rec)
                     else:
                         print(f"LLM recommendation not available on Deezer: {rec['artist']} - {rec['title']}")
@@ -784,28 +773,41 @@ async def get_llm_playlist():
 
             print(f"LLM generated {len(recommendations)} recommendations, {len(available_recommendations)} available on Deezer")
 
-            # Fetch recording_mbid and release_mbid for each available recommendation to enable feedback and album art
-            processed_recommendations = []
-            for rec in available_recommendations:
-                # Respect MusicBrainz rate limit (1 req/sec)
-                await asyncio.sleep(1)
+            # Fetch recording_mbid and release_mbid for each available recommendation to enable feedback and album art.
+            # ListenBrainz resolves the whole list in a few batched requests; whatever it can't match falls back to
+            # MusicBrainz, whose client paces lookups to 1 req/sec and answers cached ones immediately.
+            resolved = await listenbrainz_api.bulk_resolve_tracks([(rec['artist'], rec['title']) for rec in available_recommendations])
+
+            async def add_musicbrainz_info(rec, record):
+                # The album of a track resolved on Deezer is the one it will be downloaded and tagged from, so keep it
+                keep_album = bool(rec.get('deezer_id'))
+                if record:
+                    rec['recording_mbid'] = record['recording_mbid']
+                    rec['caa_release_mbid'] = record.get('caa_release_mbid') or record.get('release_mbid')
+                    rec['caa_id'] = record.get('caa_id')
+                    if record.get('album') and not keep_album:
+                        rec['album'] = record['album']
+                    return rec
+
                 mbid = await listenbrainz_api.get_recording_mbid_from_track(rec['artist'], rec['title'])
-                
+
                 rec['recording_mbid'] = mbid
                 rec['caa_release_mbid'] = None
                 rec['caa_id'] = None # Not available through this flow, but good to have for consistency
 
                 if mbid:
-                    await asyncio.sleep(1) # Another request, another sleep
                     # get_track_info returns: artist, title, album, release_date, release_mbid
                     _, _, fetched_album, _, release_mbid = await listenbrainz_api.get_track_info(mbid)
                     if release_mbid:
                         rec['caa_release_mbid'] = release_mbid
                     # Use the more accurate album title from MusicBrainz
-                    if fetched_album and fetched_album != "Unknown Album":
+                    if fetched_album and fetched_album != "Unknown Album" and not keep_album:
                         rec['album'] = fetched_album
-                
-                processed_recommendations.append(rec)
+                return rec
+
+            processed_recommendations = await asyncio.gather(*(
+                add_musicbrainz_info(rec, record) for rec, record in zip(available_recommendations, resolved)
+            ))
 
             return jsonify({"status": "success", "recommendations": processed_recommendations})
         else:
@@ -1079,6 +1081,10 @@ async def get_deezer_album_art():
         print(f"Error getting Deezer album art for {artist} - {album_title}: {e}")
         return jsonify({"status": "error", "message": f"Error getting Deeezer album art: {e}"}), 500
 
+@app.route('/api/deezer_rate_limit', methods=['GET'])
+def get_deezer_rate_limit():
+    return jsonify({"status": "success", "rate_limiter": DeezerAPI.get_rate_limiter_state()})
+
 @app.route('/api/create_smart_playlists', methods=['POST'])
 def create_smart_playlists():
     """
@@ -1231,6 +1237,8 @@ async def download_llm_recommendations_background(recommendations, download_id):
     
     total_tracks = len(recommendations)
     downloaded_count = 0
+    listenbrainz_api = ListenBrainzAPI(ROOT_LB, TOKEN_LB, USER_LB, LISTENBRAINZ_ENABLED)
+    await listenbrainz_api.enrich_recommendations(recommendations)
     for i, song in enumerate(recommendations):
         update_download_status(
             download_id, 
@@ -1241,8 +1249,8 @@ async def download_llm_recommendations_background(recommendations, download_id):
         )
         
         song['source'] = 'LLM'
-        song['recording_mbid'] = '' # Not available from LLM
-        song['release_date'] = '' # Not available from LLM
+        song.setdefault('recording_mbid', '') # Only known if ListenBrainz matched the recommendation
+        song.setdefault('release_date', '') # Only known if the recommendation was resolved on Deezer
         
         downloaded_path = await track_downloader.download_track(song)
         